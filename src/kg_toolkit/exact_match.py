@@ -2,73 +2,175 @@
 Simple Node Matcher - Knowledge Graph
 Fetches exact matches for any term, code, label or concept 
 """
-from neo4j import GraphDatabase
+from neo4j import RoutingControl
+import logging
 import os
+import sys
+
+from utils.graph_driver import get_driver
+from utils.graph_schema import ensure_lookup_indexes
+
+logger = logging.getLogger(__name__)
+
+def _intern(value):
+    """Intern repeated string values (e.g. node types) so results share one copy"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+# Definition length returned by display_only lookups
+DISPLAY_DEFINITION_LENGTH = 200
+
+# Return column for the ~6 KB embedding vector, only fetched when asked for
+EMBEDDING_COLUMN = """,
+               n.openai_embedding as embedding"""
+
+def _definition_column(display_only):
+    """Definition expression for the RETURN clause, truncated in the database for display"""
+    return "substring(n.definition, 0, $length)" if display_only else "n.definition"
 
 class get_node_match:
     """
     Get full node details for an exact match
     """
-    def __init__(self, uri, username, password):
-        """Initialize connection to Neo4j"""
-        self.driver = GraphDatabase.driver(uri, auth=(username, password))
-        print("Connected to database")
+    def __init__(self, uri, username, password, driver=None):
+        """Initialize connection to Neo4j
 
-    def get_exact_match_from_code(self, code):
+        Args:
+            driver: Optional driver to use instead of the shared one
+        """
+        self.driver = driver or get_driver(uri, username, password)
+        ensure_lookup_indexes(self.driver)
+        logger.debug("Connected to database")
+
+    def get_exact_match_from_code(self, code, include_embedding=False, display_only=False):
         """
         Retrieve node details by exact matching the code. 
-        Return term, label, concept, embedding and definition.
+        Return term, label, concept, definition and optionally the embedding.
         Args:
             code: NCIT code for a term (eg C40625)
+            include_embedding: Also return the node's embedding vector
+            display_only: Return only the first DISPLAY_DEFINITION_LENGTH characters of the definition
         Returns:
             dict: Dictionary containing node details or None if not found
         """
         query = """
         MATCH (n:NCIT {code: $code})
         RETURN n.term as term, 
-               n.definition as definition, 
-               n.type as type, 
-               n.openai_embedding as embedding
-        """
+               """ + _definition_column(display_only) + """ as definition, 
+               n.type as type""" + (EMBEDDING_COLUMN if include_embedding else "")
         
-        print(f"Finding exact match for code: {code}")
-        print("=" * 50)
+        logger.debug("Finding exact match for code: %s", code)
         
         try:
-            with self.driver.session() as session:
-                result = session.run(query, code=code)
-                record = result.single()
-                
-                if not record:
-                    print(f"No exact match found for code '{code}'")
-                    return None
-                
-                node_data = {
-                    'code': code,
-                    'term': record['term'],
-                    'definition': record['definition'],
-                    'type': record['type'],
-                    'embedding': record['embedding']
-                }
-                
-                print("Exact match found!")
-                print(f"Code: {node_data['code']}")
-                print(f"Term: {node_data['term']}")
-                print(f"Type: {node_data['type']}")
-                print(f"Definition: {node_data['definition'][:100]}..." if node_data['definition'] and len(node_data['definition']) > 100 else f"Definition: {node_data['definition']}")
-                print(f"Has Embedding: {'Yes' if node_data['embedding'] else 'No'}")
-                
-                return node_data
+            records = self.driver.execute_query(query, code=code, length=DISPLAY_DEFINITION_LENGTH, routing_=RoutingControl.READ).records
+            record = records[0] if records else None
+            
+            if not record:
+                logger.debug("No exact match found for code '%s'", code)
+                return None
+            
+            node_data = {
+                'code': code,
+                'term': record['term'],
+                'definition': record['definition'],
+                'type': _intern(record['type'])
+            }
+            if include_embedding:
+                node_data['embedding'] = record['embedding']
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                definition = node_data['definition'] or ''
+                logger.debug(
+                    "Exact match found: code=%s term=%s type=%s definition=%s",
+                    node_data['code'], node_data['term'], node_data['type'],
+                    definition[:100] + "..." if len(definition) > 100 else definition
+                )
+            
+            return node_data
                 
         except Exception as e:
-            print(f"Query failed: {e}")
+            logger.error("Query failed: %s", e)
             return None
     
-    def get_exact_match_from_term(self, term):
+    def get_exact_matches_from_codes(self, codes, include_embedding=False, display_only=False):
+        """
+        Retrieve node details for many codes in a single query.
+        Args:
+            codes: List of NCIT codes (eg ["C40625", "C4878"])
+            include_embedding: Also return each node's embedding vector
+            display_only: Return only the first DISPLAY_DEFINITION_LENGTH characters of each definition
+        Returns:
+            dict: Node details keyed by code; codes with no match are left out
+        """
+        query = """
+        UNWIND $codes AS c
+        MATCH (n:NCIT {code: c})
+        RETURN c as code,
+               n.term as term, 
+               """ + _definition_column(display_only) + """ as definition, 
+               n.type as type""" + (EMBEDDING_COLUMN if include_embedding else "")
+        
+        codes = list(dict.fromkeys(codes))
+        if not codes:
+            return {}
+        
+        try:
+            records = self.driver.execute_query(query, codes=codes, length=DISPLAY_DEFINITION_LENGTH, routing_=RoutingControl.READ).records
+            matches = {}
+            for record in records:
+                node_data = record.data()
+                node_data['type'] = _intern(node_data['type'])
+                matches[record['code']] = node_data
+            return matches
+        except Exception as e:
+            logger.error("Batch query failed: %s", e)
+            return {}
+    
+    def get_exact_matches_from_terms(self, terms, include_embedding=False, display_only=False):
+        """
+        Retrieve node details for many term names (case-insensitive) in a single query.
+        Args:
+            terms: List of term names
+            include_embedding: Also return each node's embedding vector
+            display_only: Return only the first DISPLAY_DEFINITION_LENGTH characters of each definition
+        Returns:
+            dict: Node details keyed by lower-cased term; terms with no match are left out
+        """
+        # Like get_exact_match_from_term, the first matching node is used per term
+        query = """
+        UNWIND $terms AS t
+        MATCH (n:NCIT)
+        WHERE toLower(n.term) = t
+        WITH t, collect(n)[0] AS n
+        RETURN t as key,
+               n.code as code,
+               n.term as term, 
+               """ + _definition_column(display_only) + """ as definition, 
+               n.type as type""" + (EMBEDDING_COLUMN if include_embedding else "")
+        
+        terms = list(dict.fromkeys(term.strip().lower() for term in terms))
+        if not terms:
+            return {}
+        
+        try:
+            records = self.driver.execute_query(query, terms=terms, length=DISPLAY_DEFINITION_LENGTH, routing_=RoutingControl.READ).records
+            matches = {}
+            for record in records:
+                node_data = record.data()
+                del node_data['key']
+                node_data['type'] = _intern(node_data['type'])
+                matches[record['key']] = node_data
+            return matches
+        except Exception as e:
+            logger.error("Batch query failed: %s", e)
+            return {}
+    
+    def get_exact_match_from_term(self, term, include_embedding=False, display_only=False):
         """
         Retrieve node details by exact matching the term name (case-insensitive).
         Args:
             term: Term name (e.g., "prostate", "PROSTATE", "Prostate" all match "Prostate")
+            include_embedding: Also return the node's embedding vector
+            display_only: Return only the first DISPLAY_DEFINITION_LENGTH characters of the definition
         Returns:
             dict: Dictionary containing node details or None if not found
         """
@@ -80,43 +182,41 @@ class get_node_match:
         WHERE toLower(n.term) = toLower($term)
         RETURN n.code as code,
                n.term as term, 
-               n.definition as definition, 
-               n.type as type, 
-               n.openai_embedding as embedding
-        """
+               """ + _definition_column(display_only) + """ as definition, 
+               n.type as type""" + (EMBEDDING_COLUMN if include_embedding else "")
         
-        print(f"Finding exact match for term: '{term}'")
-        print("=" * 50)
+        logger.debug("Finding exact match for term: '%s'", term)
         
         try:
-            with self.driver.session() as session:
-                result = session.run(query, term=normalized_term)
-                record = result.single()
-                
-                if not record:
-                    print(f"No exact match found for term '{term}'")
-                    return None
-                
-                
-                node_data = {
-                    'code': record['code'],
-                    'term': record['term'],  # Return the original case from database
-                    'definition': record['definition'],
-                    'type': record['type'],
-                    'embedding': record['embedding']
-                }
-                
-                print("Exact match found!")
-                print(f"Code: {node_data['code']}")
-                print(f"Term: {node_data['term']}")
-                print(f"Type: {node_data['type']}")
-                print(f"Definition: {node_data['definition'][:100]}..." if node_data['definition'] and len(node_data['definition']) > 100 else f"Definition: {node_data['definition']}")
-                print(f"Has Embedding: {'Yes' if node_data['embedding'] else 'No'}")
-                
-                return node_data
+            records = self.driver.execute_query(query, term=normalized_term, length=DISPLAY_DEFINITION_LENGTH, routing_=RoutingControl.READ).records
+            record = records[0] if records else None
+            
+            if not record:
+                logger.debug("No exact match found for term '%s'", term)
+                return None
+            
+            
+            node_data = {
+                'code': record['code'],
+                'term': record['term'],  # Return the original case from database
+                'definition': record['definition'],
+                'type': _intern(record['type'])
+            }
+            if include_embedding:
+                node_data['embedding'] = record['embedding']
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                definition = node_data['definition'] or ''
+                logger.debug(
+                    "Exact match found: code=%s term=%s type=%s definition=%s",
+                    node_data['code'], node_data['term'], node_data['type'],
+                    definition[:100] + "..." if len(definition) > 100 else definition
+                )
+            
+            return node_data
                 
         except Exception as e:
-            print(f"Query failed: {e}")
+            logger.error("Query failed: %s", e)
             return None
 
     def get_fuzzy_term_matches(self, term, limit=5):
@@ -130,51 +230,43 @@ class get_node_match:
         Returns:
             list: List of matching nodes with code, term, definition, type
         """
-        print(f"Finding fuzzy matches for term: '{term}'")
-        print("=" * 50)
+        logger.debug("Finding fuzzy matches for term: '%s'", term)
         
         
+        index_name = 'ftTermIndex'
+        
+        # Perform fulltext search
+        search_query = f"""
+        CALL db.index.fulltext.queryNodes('{index_name}', $term)
+        YIELD node, score
+        WHERE node:NCIT
+        RETURN node.code as code,
+            node.term as term,
+            node.definition as definition,
+            node.type as type,
+            score
+        ORDER BY score DESC
+        LIMIT $limit
+        """
+        
         try:
-            with self.driver.session() as session:
-                
-                index_name = 'ftTermIndex'
-                
-                # Perform fulltext search
-                search_query = f"""
-                CALL db.index.fulltext.queryNodes('{index_name}', $term)
-                YIELD node, score
-                WHERE node:NCIT
-                RETURN node.code as code,
-                    node.term as term,
-                    node.definition as definition,
-                    node.type as type,
-                    score
-                ORDER BY score DESC
-                LIMIT $limit
-                """
-                
-                search_result = session.run(search_query, term=term, limit=limit)
-                matches = []
-                
-                for record in search_result:
-                    match_data = {
-                        'code': record['code'],
-                        'term': record['term'],
-                        'definition': record['definition'],
-                        'type': record['type']
-                    }
-                    matches.append(match_data)
-                
-                # Results
-                if matches:
-                    print(f"Found {len(matches)} fuzzy matches:")
-                    for i, match in enumerate(matches, 1):
-                        print(f"  {i}. {match['term']} (Code: {match['code']})")
-                else:
-                    print("No fuzzy matches found")
-                
-                return matches
+            records = self.driver.execute_query(
+                search_query, term=term, limit=limit, routing_=RoutingControl.READ
+            ).records
+            matches = []
+            
+            for record in records:
+                match_data = {
+                    'code': record['code'],
+                    'term': record['term'],
+                    'definition': record['definition'],
+                    'type': _intern(record['type'])
+                }
+                matches.append(match_data)
+            
+            logger.debug("Found %d fuzzy matches for '%s'", len(matches), term)
+            return matches
                 
         except Exception as e:
-            print(f"Fuzzy search failed: {e}")
+            logger.error("Fuzzy search failed: %s", e)
             return []
\ No newline at end of file
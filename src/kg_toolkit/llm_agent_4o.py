@@ -6,6 +6,12 @@ Updated for GPT-4o compatibility
 """
 
 import os
+import re
+import json
+import unicodedata
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from langchain.agents import create_react_agent, AgentExecutor
 from langchain_openai import ChatOpenAI
@@ -15,12 +21,23 @@ from langchain_core.callbacks import (
     CallbackManagerForToolRun,
 )
 from langchain_core.prompts import PromptTemplate
-from langchain.memory import ConversationBufferMemory
 from pydantic import BaseModel, Field
 
 from synonym_tool import get_synonyms
 from exact_match import get_node_match
-from semantic_retrievers import SemanticSearcher
+from semantic_retrievers import get_searcher
+from offline_store import get_offline_store
+from utils.query_cache import QueryCache
+
+
+@functools.lru_cache(maxsize=1)
+def _load_env():
+    """Load a .env file once per process, if python-dotenv is installed"""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return False
+    return load_dotenv()
 
 
 class Config:
@@ -28,10 +45,24 @@ class Config:
     NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
     NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    # Chat model used by the mapping agent, e.g. gpt-4o-mini for cheaper, faster runs
+    AGENT_MODEL = os.getenv("AGENT_MODEL", "gpt-4o")
+    
+    _validated = False
     
     @classmethod
     def validate(cls):
         """Validate that all required environment variables are set"""
+        if cls._validated:
+            return
+        
+        # Pick up values from .env that were not in the environment at import time
+        if _load_env():
+            cls.NEO4J_URI = cls.NEO4J_URI or os.getenv("NEO4J_URI")
+            cls.NEO4J_USERNAME = cls.NEO4J_USERNAME or os.getenv("NEO4J_USERNAME")
+            cls.NEO4J_PASSWORD = cls.NEO4J_PASSWORD or os.getenv("NEO4J_PASSWORD")
+            cls.OPENAI_API_KEY = cls.OPENAI_API_KEY or os.getenv("OPENAI_API_KEY")
+        
         if not cls.OPENAI_API_KEY:
             raise ValueError("OpenAI API key not found. Please set the OPENAI_API_KEY environment variable.")
         
@@ -40,6 +71,77 @@ class Config:
                 "Neo4j credentials not found. Please set these environment variables:\n"
                 "NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD"
             )
+        
+        cls._validated = True
+
+
+@functools.lru_cache(maxsize=1)
+def _synonym_finder():
+    """Return the get_synonyms instance shared by the synonym tools"""
+    return get_synonyms(
+        uri=Config.NEO4J_URI,
+        username=Config.NEO4J_USERNAME,
+        password=Config.NEO4J_PASSWORD
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _node_matcher():
+    """Return the get_node_match instance shared by the matcher tools"""
+    return get_node_match(
+        uri=Config.NEO4J_URI,
+        username=Config.NEO4J_USERNAME,
+        password=Config.NEO4J_PASSWORD
+    )
+
+
+# Tool lookups keyed by (tool name, normalized query). The ReAct loop often
+# repeats a lookup, and the graph changes rarely, so entries live for an hour.
+_TOOL_CACHE = QueryCache(max_size=4096, ttl_seconds=3600)
+
+def _cached_lookup(tool_name, key, lookup):
+    """
+    Return lookup(key), reusing an earlier result for the same tool and key.
+    Empty results are not cached because the lookups also return them on errors.
+    """
+    cache_key = (tool_name, key)
+    result = _TOOL_CACHE.get(cache_key)
+    if result is None:
+        result = lookup(key)
+        if result:
+            _TOOL_CACHE.put(cache_key, result)
+    return result
+
+
+def _norm_text(text):
+    """NFKC-normalize text and collapse runs of whitespace"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def _norm(text):
+    """Cache key for case-insensitive lookups: _norm_text, case-folded"""
+    return _norm_text(text).casefold()
+
+
+def _offline_first(offline_method, online_lookup, **options):
+    """
+    Wrap a Neo4j lookup so keys found in the local offline store (see
+    offline_store.py) are answered from it; misses still go to Neo4j.
+    options are passed to both lookups.
+    """
+    store = get_offline_store()
+    if store is None:
+        return lambda key: online_lookup(key, **options)
+    offline_lookup = getattr(store, offline_method)
+    return lambda key: offline_lookup(key, **options) or online_lookup(key, **options)
+
+
+def _tool_json(status, **fields):
+    """
+    Tool output as a JSON object. status is "ok", "not_found" or "error";
+    the other fields hold the results so the agent can read them directly.
+    """
+    return json.dumps({"status": status, **fields}, ensure_ascii=False)
 
 
 # Define input schemas
@@ -61,25 +163,23 @@ class SynonymFinderTool(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None
     ) -> str:
         try:
-            synonym_finder = get_synonyms(
-                uri=Config.NEO4J_URI,
-                username=Config.NEO4J_USERNAME, 
-                password= Config.NEO4J_PASSWORD 
-            )
-            synonyms = synonym_finder.get_synonyms_from_pv(query.strip())
+            synonym_finder = _synonym_finder()
+            # PV lookups are case-sensitive, so only whitespace and Unicode forms are normalized
+            synonyms = _cached_lookup(self.name, _norm_text(query), _offline_first('synonyms_for_pv', synonym_finder.get_synonyms_from_pv))
             if synonyms:
-                return f"Found {len(synonyms)} synonyms for '{query}': {', '.join(synonyms)}"
+                return _tool_json("ok", query=query, count=len(synonyms), synonyms=list(synonyms))
             else:
-                return f"No synonyms found for '{query}'"
+                return _tool_json("not_found", query=query)
         except Exception as e:
-            return f"Error searching for synonyms: {str(e)}"
+            return _tool_json("error", error=f"Error searching for synonyms: {str(e)}")
     
     async def _arun(
         self, 
         query: str, 
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None
     ) -> str:
-        return self._run(query, run_manager=run_manager.get_sync() if run_manager else None)
+        # Lookups block on Neo4j/OpenAI I/O, so run them off the event loop
+        return await asyncio.to_thread(self._run, query, run_manager=run_manager.get_sync() if run_manager else None)
 
 class SynonymByCodeTool(BaseTool):
     name: str = "synonym_by_code"
@@ -96,26 +196,23 @@ class SynonymByCodeTool(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None
     ) -> str:
         try:
-            synonym_finder = get_synonyms(
-                uri=Config.NEO4J_URI,
-                username=Config.NEO4J_USERNAME, 
-                password= Config.NEO4J_PASSWORD 
-            )
+            synonym_finder = _synonym_finder()
             code = query.strip().upper()
-            synonyms = synonym_finder.get_synonyms_from_termcode(code)
+            synonyms = _cached_lookup(self.name, code, _offline_first('synonyms_for_code', synonym_finder.get_synonyms_from_termcode))
             if synonyms:
-                return f"Found {len(synonyms)} synonyms for code '{code}': {', '.join(synonyms)}"
+                return _tool_json("ok", code=code, count=len(synonyms), synonyms=list(synonyms))
             else:
-                return f"No synonyms found for code '{code}'"
+                return _tool_json("not_found", code=code)
         except Exception as e:
-            return f"Error searching for synonyms by code: {str(e)}"
+            return _tool_json("error", error=f"Error searching for synonyms by code: {str(e)}")
     
     async def _arun(
         self, 
         query: str, 
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None
     ) -> str:
-        return self._run(query, run_manager=run_manager.get_sync() if run_manager else None)
+        # Lookups block on Neo4j/OpenAI I/O, so run them off the event loop
+        return await asyncio.to_thread(self._run, query, run_manager=run_manager.get_sync() if run_manager else None)
 
 class NodeMatcherTool(BaseTool):
     name: str = "node_matcher"
@@ -132,26 +229,23 @@ class NodeMatcherTool(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None
     ) -> str:
         try:
-            matcher = get_node_match(
-                uri=Config.NEO4J_URI,
-                username=Config.NEO4J_USERNAME, 
-                password= Config.NEO4J_PASSWORD 
-            )
+            matcher = _node_matcher()
             code = query.strip().upper()
-            result = matcher.get_exact_match_from_code(code)
+            result = _cached_lookup(self.name, code, _offline_first('node_by_code', matcher.get_exact_match_from_code, display_only=True))
             if result:
-                return f"Found node for '{code}': Term='{result['term']}', Type='{result['type']}', Definition='{result['definition'][:200]}...'"
+                return _tool_json("ok", code=code, term=result['term'], type=result['type'], definition=result['definition'])
             else:
-                return f"No node found for code '{code}'"
+                return _tool_json("not_found", code=code)
         except Exception as e:
-            return f"Error finding node: {str(e)}"
+            return _tool_json("error", error=f"Error finding node: {str(e)}")
     
     async def _arun(
         self, 
         query: str, 
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None
     ) -> str:
-        return self._run(query, run_manager=run_manager.get_sync() if run_manager else None)
+        # Lookups block on Neo4j/OpenAI I/O, so run them off the event loop
+        return await asyncio.to_thread(self._run, query, run_manager=run_manager.get_sync() if run_manager else None)
 
 class TermMatcherTool(BaseTool):
     name: str = "term_matcher"
@@ -168,26 +262,25 @@ class TermMatcherTool(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None
     ) -> str:
         try:
-            matcher = get_node_match(
-                uri=Config.NEO4J_URI,
-                username=Config.NEO4J_USERNAME, 
-                password= Config.NEO4J_PASSWORD 
-            )
-            term = query.strip()
-            result = matcher.get_exact_match_from_term(term)
+            matcher = _node_matcher()
+            term = _norm_text(query)
+            lookup = _offline_first('node_by_term', matcher.get_exact_match_from_term, display_only=True)
+            # Terms are compared case-insensitively by the query, so every casing shares one entry
+            result = _cached_lookup(self.name, _norm(term), lambda _key: lookup(term))
             if result:
-                return f"Found node for '{term}': Code='{result['code']}', Type='{result['type']}', Definition='{result['definition'][:200]}...'"
+                return _tool_json("ok", query=term, code=result['code'], term=result['term'], type=result['type'], definition=result['definition'])
             else:
-                return f"No exact match found for term '{term}'"
+                return _tool_json("not_found", query=term)
         except Exception as e:
-            return f"Error finding term: {str(e)}"
+            return _tool_json("error", error=f"Error finding term: {str(e)}")
     
     async def _arun(
         self, 
         query: str, 
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None
     ) -> str:
-        return self._run(query, run_manager=run_manager.get_sync() if run_manager else None)
+        # Lookups block on Neo4j/OpenAI I/O, so run them off the event loop
+        return await asyncio.to_thread(self._run, query, run_manager=run_manager.get_sync() if run_manager else None)
 
 class FuzzyTermMatcherTool(BaseTool):
     name: str = "fuzzy_term_matcher"
@@ -205,31 +298,150 @@ class FuzzyTermMatcherTool(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None
     ) -> str:
         try:
-            matcher = get_node_match(
-                uri=Config.NEO4J_URI,
-                username=Config.NEO4J_USERNAME, 
-                password= Config.NEO4J_PASSWORD 
-            )
-            term = query.strip()
-            results = matcher.get_fuzzy_term_matches(term, limit=5)
-            
+            matcher = _node_matcher()
+            term = _norm_text(query)
+            results = _cached_lookup(self.name, _norm(term), matcher.get_fuzzy_term_matches)
+        
             if results:
-                response_parts = [f"Found {len(results)} similar terms for '{term}':"]
-                for i, result in enumerate(results, 1):
-                    response_parts.append(f"\n{i}. {result['term']} (Code: {result['code']})")
-                response_parts.append(f"\nSuggestion: Try exact search with one of these terms.")
-                return "".join(response_parts)
+                matches = [{"term": result['term'], "code": result['code']} for result in results]
+                return _tool_json("ok", query=term, count=len(matches), matches=matches,
+                                  suggestion="Try exact search with one of these terms.")
             else:
-                return f"No similar terms found for '{term}'"
+                return _tool_json("not_found", query=term)
         except Exception as e:
-            return f"Error in fuzzy term search: {str(e)}"
+            return _tool_json("error", error=f"Error in fuzzy term search: {str(e)}")
     
     async def _arun(
         self, 
         query: str, 
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None
     ) -> str:
-        return self._run(query, run_manager=run_manager.get_sync() if run_manager else None)
+        # Lookups block on Neo4j/OpenAI I/O, so run them off the event loop
+        return await asyncio.to_thread(self._run, query, run_manager=run_manager.get_sync() if run_manager else None)
+
+def _pv_payload(query, results):
+    """Fields of the semantic PV search output"""
+    if not results:
+        return {"status": "not_found", "query": query}
+    
+    matches = []
+    for result in results:
+        metadata = result['metadata']
+        matches.append({
+            "pv_term": metadata['pv_term'],
+            "pv_code": metadata['pv_code'],
+            "cde_term": metadata['cde_term'],
+            "cde_code": metadata['cde'],
+            "score": round(metadata['score'], 4)
+        })
+    
+    return {"status": "ok", "query": query, "count": len(matches), "matches": matches}
+
+def _ncit_payload(query, results):
+    """Fields of the semantic NCIT search output"""
+    if not results:
+        return {"status": "not_found", "query": query}
+    
+    matches = []
+    for result in results:
+        metadata = result['metadata']
+        matches.append({
+            "concept_term": metadata['concept_term'],
+            "concept_code": metadata['concept_code'],
+            "pv_term": metadata['pv_term'],
+            "pv_code": metadata['pv_code'],
+            "cde_count": len(metadata['of_cdes'] or []),
+            "score": round(metadata['score'], 4)
+        })
+    
+    return {"status": "ok", "query": query, "count": len(matches), "matches": matches}
+
+def _format_pv_results(query, results):
+    """Tool output for semantic PV search results"""
+    return json.dumps(_pv_payload(query, results), ensure_ascii=False)
+
+def _format_ncit_results(query, results):
+    """Tool output for semantic NCIT search results"""
+    return json.dumps(_ncit_payload(query, results), ensure_ascii=False)
+
+def _format_dual_results(query, pv_results, ncit_results):
+    """Tool output for the combined PV and NCIT searches"""
+    pv, ncit = _pv_payload(query, pv_results), _ncit_payload(query, ncit_results)
+    status = "ok" if "ok" in (pv["status"], ncit["status"]) else "not_found"
+    return _tool_json(status, query=query, pv_search=pv, ncit_search=ncit)
+
+def _semantic_pv_lookup(query):
+    searcher = get_searcher()
+    return _cached_lookup("semantic_pv_search", query, lambda text: searcher.find_cde_from_pv_term(text, top_k=3))
+
+def _semantic_ncit_lookup(query):
+    searcher = get_searcher()
+    return _cached_lookup("semantic_ncit_search", query, lambda text: searcher.find_cde_from_ncit_term(text, top_k=3))
+
+async def _acached_lookup(tool_name, key, alookup):
+    """Async _cached_lookup for coroutine lookups, sharing the same cache"""
+    cache_key = (tool_name, key)
+    result = _TOOL_CACHE.get(cache_key)
+    if result is None:
+        result = await alookup(key)
+        if result:
+            _TOOL_CACHE.put(cache_key, result)
+    return result
+
+async def _asemantic_pv_lookup(query):
+    searcher = get_searcher()
+    return await _acached_lookup("semantic_pv_search", query, lambda text: searcher.afind_cde_from_pv_term(text, top_k=3))
+
+async def _asemantic_ncit_lookup(query):
+    searcher = get_searcher()
+    return await _acached_lookup("semantic_ncit_search", query, lambda text: searcher.afind_cde_from_ncit_term(text, top_k=3))
+
+def _cached_dual_results(query):
+    """Cached (PV results, NCIT results) for query, or None unless both are cached"""
+    pv_results = _TOOL_CACHE.get(("semantic_pv_search", query))
+    ncit_results = _TOOL_CACHE.get(("semantic_ncit_search", query))
+    if pv_results is None or ncit_results is None:
+        return None
+    return pv_results, ncit_results
+
+def _semantic_dual_lookup(query):
+    """
+    PV and NCIT semantic results for query. The query is embedded once and
+    only the two vector searches run concurrently.
+    """
+    cached = _cached_dual_results(query)
+    if cached is not None:
+        return cached
+    
+    searcher = get_searcher()
+    embedding = searcher.get_embedding(query)
+    if not embedding:
+        return [], []
+    
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        pv_future = pool.submit(_cached_lookup, "semantic_pv_search", query,
+                                lambda text: searcher.find_cde_from_pv_embedding(embedding, top_k=3))
+        ncit_future = pool.submit(_cached_lookup, "semantic_ncit_search", query,
+                                  lambda text: searcher.find_cde_from_ncit_embedding(embedding, top_k=3))
+        return pv_future.result(), ncit_future.result()
+
+async def _asemantic_dual_lookup(query):
+    """Async _semantic_dual_lookup"""
+    cached = _cached_dual_results(query)
+    if cached is not None:
+        return cached
+    
+    searcher = get_searcher()
+    embedding = await searcher.aget_embedding(query)
+    if not embedding:
+        return [], []
+    
+    pv_results, ncit_results = await asyncio.gather(
+        _acached_lookup("semantic_pv_search", query, lambda text: searcher.afind_cde_from_pv_embedding(embedding, top_k=3)),
+        _acached_lookup("semantic_ncit_search", query, lambda text: searcher.afind_cde_from_ncit_embedding(embedding, top_k=3))
+    )
+    return pv_results, ncit_results
+
 
 class SemanticPVSearchTool(BaseTool):
     name: str = "semantic_pv_search"
@@ -248,38 +460,22 @@ class SemanticPVSearchTool(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None
     ) -> str:
         try:
-            searcher = SemanticSearcher()
-            results = searcher.find_cde_from_pv_term(query.strip(), top_k=3)
-            searcher.close()
-            
-            if not results:
-                return f"No semantic matches found for PV term '{query}'"
-            
-            response_parts = [f"Found {len(results)} semantic matches for '{query}' through PV search:"]
-            
-            for i, result in enumerate(results, 1):
-                metadata = result['metadata']
-                score = metadata['score']
-                pv_term = metadata['pv_term']
-                pv_code = metadata['pv_code']
-                cde_term = metadata['cde_term']
-                cde_code = metadata['cde']
-                
-                response_parts.append(
-                    f"\n{i}. PV: '{pv_term}' (Code: {pv_code}) -> CDE: '{cde_term}' (Code: {cde_code}) [Similarity: {score:.4f}]"
-                )
-            
-            return "".join(response_parts)
-            
+            results = _semantic_pv_lookup(query.strip())
+            return _format_pv_results(query, results)
         except Exception as e:
-            return f"Error in semantic PV search: {str(e)}"
+            return _tool_json("error", error=f"Error in semantic PV search: {str(e)}")
     
     async def _arun(
         self, 
         query: str, 
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None
     ) -> str:
-        return self._run(query, run_manager=run_manager.get_sync() if run_manager else None)
+        # The searcher has native async Neo4j/OpenAI calls, so no worker thread is needed
+        try:
+            results = await _asemantic_pv_lookup(query.strip())
+            return _format_pv_results(query, results)
+        except Exception as e:
+            return _tool_json("error", error=f"Error in semantic PV search: {str(e)}")
 
 class SemanticNCITSearchTool(BaseTool):
     name: str = "semantic_ncit_search"
@@ -298,41 +494,56 @@ class SemanticNCITSearchTool(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None
     ) -> str:
         try:
-            searcher = SemanticSearcher()
-            results = searcher.find_cde_from_ncit_term(query.strip(), top_k=3)
-            searcher.close()
-            
-            if not results:
-                return f"No semantic matches found for NCIT term '{query}'"
-            
-            response_parts = [f"Found {len(results)} semantic matches for '{query}' through NCIT search:"]
-            
-            for i, result in enumerate(results, 1):
-                metadata = result['metadata']
-                score = metadata['score']
-                concept_term = metadata['concept_term']
-                concept_code = metadata['concept_code']
-                pv_term = metadata['pv_term']
-                pv_code = metadata['pv_code']
-                cde_codes = metadata['of_cdes']
-                
-                cde_summary = f"{len(cde_codes)} CDEs" if cde_codes else "No CDEs"
-                
-                response_parts.append(
-                    f"\n{i}. NCIT: '{concept_term}' (Code: {concept_code}) -> PV: '{pv_term}' (Code: {pv_code}) -> {cde_summary} [Similarity: {score:.4f}]"
-                )
+            results = _semantic_ncit_lookup(query.strip())
+            return _format_ncit_results(query, results)
+        except Exception as e:
+            return _tool_json("error", error=f"Error in semantic NCIT search: {str(e)}")
+    
+    async def _arun(
+        self, 
+        query: str, 
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None
+    ) -> str:
+        # The searcher has native async Neo4j/OpenAI calls, so no worker thread is needed
+        try:
+            results = await _asemantic_ncit_lookup(query.strip())
+            return _format_ncit_results(query, results)
+        except Exception as e:
+            return _tool_json("error", error=f"Error in semantic NCIT search: {str(e)}")
+
+class SemanticDualSearchTool(BaseTool):
+    name: str = "semantic_dual_search"
+    description: str = """
+    Useful for running the PV and NCIT semantic searches together in one step.
+    Use this tool when exact matches and synonyms fail and you would otherwise call semantic_pv_search and then semantic_ncit_search.
+    Both vector searches run at the same time on the same input.
+    Returns the PV search results followed by the NCIT search results, with similarity scores.
+    """
+    args_schema: type[BaseModel] = QueryInput
+    
+    def _run(
+        self, 
+        query: str, 
+        run_manager: Optional[CallbackManagerForToolRun] = None
+    ) -> str:
+        try:
+            pv_results, ncit_results = _semantic_dual_lookup(query.strip())
             
-            return "".join(response_parts)
+            return _format_dual_results(query, pv_results, ncit_results)
             
         except Exception as e:
-            return f"Error in semantic NCIT search: {str(e)}"
+            return _tool_json("error", error=f"Error in semantic dual search: {str(e)}")
     
     async def _arun(
         self, 
         query: str, 
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None
     ) -> str:
-        return self._run(query, run_manager=run_manager.get_sync() if run_manager else None)
+        try:
+            pv_results, ncit_results = await _asemantic_dual_lookup(query.strip())
+            return _format_dual_results(query, pv_results, ncit_results)
+        except Exception as e:
+            return _tool_json("error", error=f"Error in semantic dual search: {str(e)}")
 
 class SemanticCDEDefinitionTool(BaseTool):
     name: str = "semantic_cde_definition"
@@ -351,41 +562,37 @@ class SemanticCDEDefinitionTool(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None
     ) -> str:
         try:
-            searcher = SemanticSearcher()
-            results = searcher.find_cde_by_definition_similarity(query.strip(), top_k=3)
-            searcher.close()
+            searcher = get_searcher()
+            results = _cached_lookup(self.name, query.strip(), lambda text: searcher.find_cde_by_definition_similarity(text, top_k=3))
             
             if not results:
-                return f"No CDE definition matches found for '{query}'"
+                return _tool_json("not_found", query=query)
             
-            response_parts = [f"Found {len(results)} CDE definition matches for '{query}':"]
-            
-            for i, result in enumerate(results, 1):
+            matches = []
+            for result in results:
                 metadata = result['metadata']
-                score = metadata['score']
-                cde_term = metadata['cde_term']
-                cde_code = metadata['cde_code']
-                cde_definition = metadata['cde_definition']
+                cde_definition = metadata['cde_definition'] or ""
                 
                 # Truncate long definitions
-                truncated_def = cde_definition[:150] + "..." if len(cde_definition) > 150 else cde_definition
-                
-                response_parts.append(
-                    f"\n{i}. CDE: '{cde_term}' (Code: {cde_code}) [Similarity: {score:.4f}]"
-                    f"\n   Definition: {truncated_def}"
-                )
+                matches.append({
+                    "cde_term": metadata['cde_term'],
+                    "cde_code": metadata['cde_code'],
+                    "definition": cde_definition[:150] + "..." if len(cde_definition) > 150 else cde_definition,
+                    "score": round(metadata['score'], 4)
+                })
             
-            return "".join(response_parts)
+            return _tool_json("ok", query=query, count=len(matches), matches=matches)
             
         except Exception as e:
-            return f"Error in semantic CDE definition search: {str(e)}"
+            return _tool_json("error", error=f"Error in semantic CDE definition search: {str(e)}")
     
     async def _arun(
         self, 
         query: str, 
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None
     ) -> str:
-        return self._run(query, run_manager=run_manager.get_sync() if run_manager else None)
+        # Lookups block on Neo4j/OpenAI I/O, so run them off the event loop
+        return await asyncio.to_thread(self._run, query, run_manager=run_manager.get_sync() if run_manager else None)
 
 class SemanticNCITDefinitionTool(BaseTool):
     name: str = "semantic_ncit_definition"
@@ -404,79 +611,43 @@ class SemanticNCITDefinitionTool(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None
     ) -> str:
         try:
-            searcher = SemanticSearcher()
-            results = searcher.find_ncit_by_definition_similarity(query.strip(), top_k=3)
-            searcher.close()
+            searcher = get_searcher()
+            results = _cached_lookup(self.name, query.strip(), lambda text: searcher.find_ncit_by_definition_similarity(text, top_k=3))
             
             if not results:
-                return f"No NCIT definition matches found for '{query}'"
+                return _tool_json("not_found", query=query)
             
-            response_parts = [f"Found {len(results)} NCIT definition matches for '{query}':"]
-            
-            for i, result in enumerate(results, 1):
+            matches = []
+            for result in results:
                 metadata = result['metadata']
-                score = metadata['score']
-                concept_term = metadata['concept_term']
-                concept_code = metadata['concept_code']
-                concept_definition = metadata['concept_definition']
+                concept_definition = metadata['concept_definition'] or ""
                 
                 # Truncate long definitions
-                truncated_def = concept_definition[:150] + "..." if len(concept_definition) > 150 else concept_definition
-                
-                response_parts.append(
-                    f"\n{i}. NCIT: '{concept_term}' (Code: {concept_code}) [Similarity: {score:.4f}]"
-                    f"\n   Definition: {truncated_def}"
-                )
+                matches.append({
+                    "concept_term": metadata['concept_term'],
+                    "concept_code": metadata['concept_code'],
+                    "definition": concept_definition[:150] + "..." if len(concept_definition) > 150 else concept_definition,
+                    "score": round(metadata['score'], 4)
+                })
             
-            return "".join(response_parts)
+            return _tool_json("ok", query=query, count=len(matches), matches=matches)
             
         except Exception as e:
-            return f"Error in semantic NCIT definition search: {str(e)}"
+            return _tool_json("error", error=f"Error in semantic NCIT definition search: {str(e)}")
     
     async def _arun(
         self, 
         query: str, 
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None
     ) -> str:
-        return self._run(query, run_manager=run_manager.get_sync() if run_manager else None)
+        # Lookups block on Neo4j/OpenAI I/O, so run them off the event loop
+        return await asyncio.to_thread(self._run, query, run_manager=run_manager.get_sync() if run_manager else None)
 
 
-def create_fresh_agent():
-    """Create and configure the LangChain agent"""
-    
-    Config.validate()
-    
-    # Initialize LLM with GPT-4o
-    llm = ChatOpenAI(
-        model="gpt-4o",
-        temperature=0,
-        openai_api_key=Config.OPENAI_API_KEY
-    )
-    
-     # adding tools in priority order
-    tools = [
-        # Exact match tools (highest priority)
-        TermMatcherTool(),
-        NodeMatcherTool(),
-        
-        # Fuzzy match tool (for exploration)
-        FuzzyTermMatcherTool(),
-        
-        # Synonym tools (medium priority) 
-        SynonymFinderTool(),
-        SynonymByCodeTool(),
-        
-        # Semantic search tools (fallback)
-        SemanticPVSearchTool(),
-        SemanticNCITSearchTool(),
-        
-        # Definition-based semantic search (specialized)
-        SemanticCDEDefinitionTool(),
-        SemanticNCITDefinitionTool()
-    ]
-    
-    # Create the prompt template for ReAct agent
-    prompt_template = """
+# Static ReAct prompt. Everything before the {input} question is identical on
+# every call, which lets OpenAI serve that prefix from its prompt cache (applied
+# automatically to prompts over 1024 tokens), so keep per-query text at the end.
+AGENT_PROMPT_TEMPLATE = """
     You are an expert medical data mapper specializing in NCIT (National Cancer Institute Thesaurus) terminology.
     Your job is to help map raw medical data values to standardized NCIT terms and codes. 
     
@@ -496,6 +667,7 @@ def create_fresh_agent():
     4. SEMANTIC SEARCH TOOLS (use as fallback):
        - semantic_pv_search: Find semantically similar terms through PV matching
        - semantic_ncit_search: Find semantically similar terms through NCIT concept matching
+       - semantic_dual_search: Run semantic_pv_search and semantic_ncit_search together in one step
     
     5. DEFINITION-BASED SEMANTIC SEARCH (use for descriptions):
        - semantic_cde_definition: Find CDEs by description similarity
@@ -505,7 +677,7 @@ def create_fresh_agent():
     - For a term: term_matcher -> fuzzy_term_matcher -> semantic_ncit_search
     - For a code that starts with C: node_matcher -> synonym_by_code
     - For a phrase like input that contains over 4 words -> semantic_cde_definition -> semantic_ncit_definition  
-    - For a set of strings or phrase: term_matcher -> semantic_pv_search -> semantic_ncit_search -> semantic_cde_definition -> semantic_ncit_definition
+    - For a set of strings or phrase: term_matcher -> semantic_dual_search -> semantic_cde_definition -> semantic_ncit_definition
 
     Always provide:
     - The recommended NCIT code and term (if found)
@@ -526,6 +698,11 @@ def create_fresh_agent():
     
     Be thorough but concise in your analysis.
 
+    Every tool returns a JSON object. Its "status" is "ok" when results were found,
+    "not_found" when the database has no match, or "error" with the message in "error".
+    Codes, terms, definitions and similarity "score" values are given as separate fields;
+    use them as returned instead of calling another tool to look up the same code or term again.
+
     You have access to the following tools:
 
     {tools}
@@ -546,6 +723,58 @@ def create_fresh_agent():
     Question: {input}
     Thought: {agent_scratchpad}
     """
+
+
+def create_fresh_agent(model=None, temperature=0):
+    """
+    Return the configured LangChain agent and its prompt template.
+    The executor holds no per-run state, so one instance per (model, temperature)
+    is built and then shared by every mapping call. model defaults to Config.AGENT_MODEL.
+    """
+    Config.validate()
+    return _build_agent(model or Config.AGENT_MODEL, temperature)
+
+@functools.lru_cache(maxsize=4)
+def _build_agent(model, temperature):
+    """Create and configure the LangChain agent"""
+    
+    # Streaming lets the ReAct parser see the Action line as soon as it is
+    # generated; transient API errors are retried instead of failing the mapping
+    llm = ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        openai_api_key=Config.OPENAI_API_KEY,
+        streaming=True,
+        max_retries=2,
+        # Route every mapping call to the same prompt-cache shard
+        extra_body={"prompt_cache_key": "ncit-mapper-agent"}
+    )
+    
+     # adding tools in priority order
+    tools = [
+        # Exact match tools (highest priority)
+        TermMatcherTool(),
+        NodeMatcherTool(),
+        
+        # Fuzzy match tool (for exploration)
+        FuzzyTermMatcherTool(),
+        
+        # Synonym tools (medium priority) 
+        SynonymFinderTool(),
+        SynonymByCodeTool(),
+        
+        # Semantic search tools (fallback)
+        SemanticPVSearchTool(),
+        SemanticNCITSearchTool(),
+        SemanticDualSearchTool(),
+        
+        # Definition-based semantic search (specialized)
+        SemanticCDEDefinitionTool(),
+        SemanticNCITDefinitionTool()
+    ]
+    
+    # Create the prompt template for ReAct agent
+    prompt_template = AGENT_PROMPT_TEMPLATE
     
     prompt = PromptTemplate(
         template=prompt_template,
@@ -577,6 +806,81 @@ def map_raw_data_isolated(agent_executor, system_prompt, raw_value):
     except Exception as e:
         return f"Error processing mapping: {str(e)}"
 
+_NCIT_CODE_RE = re.compile(r'^C\d+$', re.IGNORECASE)
+
+def prefetch_exact_matches(raw_values):
+    """
+    Fetch the node_matcher/term_matcher results for raw_values with one query
+    per kind and store them in the tool cache, so the agents' exact-match
+    calls on these values skip Neo4j.
+    Returns:
+        int: Number of values with a match
+    """
+    codes, terms = [], []
+    for value in raw_values:
+        value = value.strip()
+        if _NCIT_CODE_RE.match(value):
+            codes.append(value.upper())
+        elif value:
+            terms.append(_norm_text(value))
+    
+    matcher = _node_matcher()
+    found = 0
+    # Keys match the ones NodeMatcherTool and TermMatcherTool look up
+    for code, node in matcher.get_exact_matches_from_codes(codes, display_only=True).items():
+        _TOOL_CACHE.put(("node_matcher", code), node)
+        found += 1
+    term_matches = matcher.get_exact_matches_from_terms(terms, display_only=True)
+    for term in dict.fromkeys(terms):
+        node = term_matches.get(term.lower())
+        if node:
+            _TOOL_CACHE.put(("term_matcher", _norm(term)), node)
+            found += 1
+    return found
+
+async def map_raw_data_batch(agent_executor, system_prompt, raw_values, max_concurrency=8):
+    """
+    Map many raw data values, running up to max_concurrency agent runs at once.
+    The values are embedded and exact-matched in bulk first, so the agents'
+    semantic searches and exact lookups on them skip per-query round trips.
+    Returns:
+        list: One mapping result per raw value, in input order
+    """
+    raw_values = [value.strip() for value in raw_values]
+    try:
+        await asyncio.gather(
+            asyncio.to_thread(get_searcher().prime_embeddings, [value for value in raw_values if value]),
+            asyncio.to_thread(prefetch_exact_matches, raw_values)
+        )
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def map_one(raw_value):
+            async with semaphore:
+                return await asyncio.to_thread(map_raw_data_isolated, agent_executor, system_prompt, raw_value)
+        
+        return await asyncio.gather(*(map_one(value) for value in raw_values))
+    finally:
+        # Release the async clients made for this event loop; other batches keep their own
+        await get_searcher().aclose()
+
+def map_raw_data_isolated_stream(agent_executor, system_prompt, raw_value):
+    """
+    Map a raw data value to NCIT terminology, yielding the agent transcript as it runs.
+    Yields each Thought/Action, its Observation and finally the Final Answer,
+    so callers can show progress before the whole run completes.
+    """
+    try:
+        for chunk in agent_executor.stream({"input": f"Raw medical data value to map: \"{raw_value}\""}):
+            for action in chunk.get("actions", []):
+                yield f"Thought: {action.log.strip()}\n"
+            for step in chunk.get("steps", []):
+                yield f"Observation: {step.observation}\n\n"
+            if "output" in chunk:
+                yield f"Final Answer: {chunk['output']}"
+    except Exception as e:
+        yield f"Error processing mapping: {str(e)}"
+
 def create_agent():
     """Legacy function for backward compatibility - DEPRECATED"""
     return create_fresh_agent()
@@ -0,0 +1,188 @@
+"""
+Offline NCIT Store - Knowledge Graph
+Local SQLite copy of the exact-match and synonym lookups, so the agent tools
+can answer them without a Neo4j round trip. Build it with:
+
+    python offline_store.py [path]
+"""
+import functools
+import logging
+import os
+import sqlite3
+import sys
+import threading
+
+from neo4j import READ_ACCESS
+
+from exact_match import DISPLAY_DEFINITION_LENGTH
+from utils.graph_driver import get_driver
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = "ncit_offline.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (code TEXT PRIMARY KEY, term TEXT, type TEXT, definition TEXT);
+CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, code TEXT);
+CREATE TABLE IF NOT EXISTS pv_syn (pv TEXT, syn TEXT);
+CREATE TABLE IF NOT EXISTS code_syn (code TEXT, syn TEXT);
+CREATE INDEX IF NOT EXISTS pv_syn_pv ON pv_syn (pv);
+CREATE INDEX IF NOT EXISTS code_syn_code ON code_syn (code);
+"""
+
+_NODES_QUERY = """
+MATCH (n:NCIT)
+RETURN n.code as code, n.term as term, n.type as type, n.definition as definition
+"""
+
+_PV_SYNONYMS_QUERY = """
+MATCH (pv:PV)-[:HAS_CONCEPT]->(c:NCIT)-[:HAS_SYNONYM]->(syn:SYN)
+WHERE syn.term IS NOT NULL
+RETURN pv.term as pv, syn.term as syn
+"""
+
+_CODE_SYNONYMS_QUERY = """
+MATCH (n:NCIT)-[:HAS_SYNONYM]->(syn:SYN)
+WHERE syn.term IS NOT NULL
+RETURN n.code as code, syn.term as syn
+"""
+
+
+class OfflineStore:
+    """
+    Read-only lookups against a store written by build_offline_store
+    """
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        # One connection is shared by the tool threads
+        self._lock = threading.Lock()
+
+    def _fetch(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def node_by_code(self, code, display_only=False):
+        """Node details for an NCIT code, or None if it is not in the store"""
+        rows = self._fetch(
+            f"SELECT code, term, type, {_definition_column('definition', display_only)} FROM nodes WHERE code = ?",
+            (code,)
+        )
+        return _node(rows[0]) if rows else None
+
+    def node_by_term(self, term, display_only=False):
+        """Node details for a term (case-insensitive), or None if it is not in the store"""
+        rows = self._fetch(
+            f"SELECT n.code, n.term, n.type, {_definition_column('n.definition', display_only)} "
+            "FROM terms t JOIN nodes n ON n.code = t.code WHERE t.term = ?",
+            (term.strip().lower(),)
+        )
+        return _node(rows[0]) if rows else None
+
+    def synonyms_for_pv(self, pv):
+        """Synonyms reached through PV -> NCIT -> SYN"""
+        return [row[0] for row in self._fetch("SELECT syn FROM pv_syn WHERE pv = ?", (pv,))]
+
+    def synonyms_for_code(self, code):
+        """Synonyms of an NCIT code"""
+        return [row[0] for row in self._fetch("SELECT syn FROM code_syn WHERE code = ?", (code,))]
+
+    def close(self):
+        self._conn.close()
+
+
+def _definition_column(column, display_only):
+    """Definition column, cut to DISPLAY_DEFINITION_LENGTH characters for display"""
+    return f"substr({column}, 1, {DISPLAY_DEFINITION_LENGTH})" if display_only else column
+
+
+def _node(row):
+    code, term, node_type, definition = row
+    return {'code': code, 'term': term, 'type': node_type, 'definition': definition}
+
+
+@functools.lru_cache(maxsize=1)
+def get_offline_store():
+    """
+    Return the store at NCIT_OFFLINE_DB (default ncit_offline.sqlite),
+    or None when it has not been built
+    """
+    path = os.getenv("NCIT_OFFLINE_DB", DEFAULT_PATH)
+    if not os.path.exists(path):
+        return None
+    try:
+        return OfflineStore(path)
+    except sqlite3.Error as e:
+        logger.warning("Could not open offline store %s: %s", path, e)
+        return None
+
+
+def build_offline_store(driver, path=DEFAULT_PATH, batch_size=5000):
+    """
+    Dump NCIT nodes and synonym lookups from Neo4j into a fresh SQLite file.
+    Returns:
+        dict: Number of rows written per table
+    """
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript(_SCHEMA)
+    counts = {}
+
+    def copy(query, sql, to_row, table):
+        # Stream records so the whole graph is never held in memory
+        counts[table] = 0
+        with driver.session(default_access_mode=READ_ACCESS) as session:
+            rows = []
+            for record in session.run(query):
+                rows.append(to_row(record))
+                if len(rows) >= batch_size:
+                    conn.executemany(sql, rows)
+                    counts[table] += len(rows)
+                    rows = []
+            conn.executemany(sql, rows)
+            counts[table] += len(rows)
+
+    copy(_NODES_QUERY, "INSERT OR IGNORE INTO nodes VALUES (?, ?, ?, ?)",
+         lambda r: (r['code'], r['term'], r['type'], r['definition']), 'nodes')
+    # Case-insensitive term index; the first node wins when terms collide.
+    # Terms are lower-cased in Python to match node_by_term (SQLite lower() is ASCII-only).
+    cursor = conn.cursor()
+    cursor.execute("SELECT term, code FROM nodes WHERE term IS NOT NULL ORDER BY rowid")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        conn.executemany("INSERT OR IGNORE INTO terms VALUES (?, ?)", [(term.lower(), code) for term, code in rows])
+    counts['terms'] = conn.execute("SELECT count(*) FROM terms").fetchone()[0]
+    copy(_PV_SYNONYMS_QUERY, "INSERT INTO pv_syn VALUES (?, ?)",
+         lambda r: (r['pv'], r['syn']), 'pv_syn')
+    copy(_CODE_SYNONYMS_QUERY, "INSERT INTO code_syn VALUES (?, ?)",
+         lambda r: (r['code'], r['syn']), 'code_syn')
+
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, path)
+    return counts
+
+
+def main():
+    """Build the offline store from the database configured in the environment"""
+    path = sys.argv[1] if len(sys.argv) > 1 else os.getenv("NCIT_OFFLINE_DB", DEFAULT_PATH)
+
+    print(f"Building offline store at {path}...")
+    try:
+        counts = build_offline_store(get_driver(), path)
+    except Exception as e:
+        print(f"Build failed: {e}")
+        sys.exit(1)
+
+    for table, count in counts.items():
+        print(f"  {table}: {count} rows")
+    print("Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -33,7 +33,7 @@ def show_home_page():
                     st.markdown("### Quick Result")
                     
                     if "Final Answer:" in result:
-                        final_section = result.split("Final Answer:")[-1]
+                        final_section = result.rpartition("Final Answer:")[2]
                         st.success("✅ Mapping found!")
                         with st.expander("View Result Details"):
                             st.text(final_section)
@@ -1,39 +1,386 @@
 import os
+import re
+import copy
+import atexit
+import asyncio
+import functools
+import threading
+import weakref
+import httpx
 import openai
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, GraphDatabase
 import numpy as np
 
+from utils.embedding_cache import EmbeddingCache
+from utils.query_cache import QueryCache
+from utils.semantic_cache import SemanticCache
+
 #from dotenv import load_dotenv
 
 #load_dotenv()
 
+# Vector search on PV terms, shared by the baseline and context-aware searches
+PV_TO_CDE_QUERY = """
+CALL db.index.vector.queryNodes('pvIndex', $top_k, $embedding) 
+YIELD node, score
+WHERE node:PV
+WITH node, score
+MATCH (node)<-[:HAS_PV]-(vdm:VDM)<-[:HAS_VDM]-(cde:CDE)
+RETURN node.definition as text, score,
+       {score: score, 
+        pv_code: node.code, 
+        pv_term: node.term,
+        cde: cde.code, 
+        cde_term: cde.term, 
+        cde_defn: cde.definition} as metadata
+ORDER BY score DESC
+"""
+
+# Vector search on NCIT concepts combined with graph traversal to their PVs and CDEs
+NCIT_TO_CDE_QUERY = """
+CALL db.index.vector.queryNodes('ncitIndex', $top_k, $embedding) 
+YIELD node, score
+WHERE node:NCIT
+WITH node, score
+MATCH (node)<-[:HAS_CONCEPT]-(pv:PV)
+OPTIONAL MATCH (pv)<-[:HAS_PV]-(vdm:VDM)<-[:HAS_VDM]-(cde:CDE)
+WITH collect(cde.code) as cdes, node, pv, score
+RETURN node.definition as text, score,
+       {score: score, 
+        concept_code: node.code, 
+        concept_term: node.term,
+        pv_code: pv.code, 
+        pv_term: pv.term,
+        of_cdes: cdes} as metadata
+ORDER BY score DESC
+"""
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+# Persisted embeddings live next to this module, whatever the working directory
+DEFAULT_EMBEDDING_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.embedding_cache.sqlite')
+
+# Connection limits for the shared OpenAI HTTP clients
+OPENAI_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=16)
+OPENAI_TIMEOUT = 30
+
+# AsyncOpenAI clients by event loop; each pool is bound to the loop it was made in
+_async_openai = weakref.WeakKeyDictionary()
+_async_openai_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _openai_client():
+    """OpenAI client shared by every searcher, so HTTPS connections are reused"""
+    return openai.OpenAI(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        http_client=httpx.Client(limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_TIMEOUT)
+    )
+
+
+def _async_openai_client():
+    """
+    AsyncOpenAI client shared by every searcher on the running event loop.
+    Each loop gets its own client, dropped along with the loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _async_openai_lock:
+        client = _async_openai.get(loop)
+        if client is None:
+            client = openai.AsyncOpenAI(
+                api_key=os.getenv('OPENAI_API_KEY'),
+                http_client=httpx.AsyncClient(limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_TIMEOUT)
+            )
+            _async_openai[loop] = client
+    return client
+
+
+async def _aclose_async_openai():
+    """Close the running loop's AsyncOpenAI client, if one was made"""
+    with _async_openai_lock:
+        client = _async_openai.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+# Matches node.definition, cde.definition, ... so display searches can truncate them in Cypher
+_DEFINITION_RE = re.compile(r'\b(\w+)\.definition\b')
+
+def _strip_vector(row):
+    """Copy of a result row without the node vector kept for rescoring"""
+    row = dict(row)
+    row.pop('vector', None)
+    return row
+
+
+def _store_results(cache, search_type, embedding, results):
+    """Add fresh results to the result cache (if any) and return them without vectors"""
+    if cache is None:
+        return results
+    cache.add(search_type, embedding, results)
+    return [_strip_vector(row) for row in results]
+
+
+def _rescore(rows, embedding):
+    """
+    Recompute the scores of cached rows for a new query embedding and re-sort them.
+    Scores use Neo4j's normalized cosine, (1 + cos) / 2, like the vector index.
+    Returns None (a cache miss) if rows is None or a row has no node vector.
+    """
+    if rows is None:
+        return None
+    if any(row.get('vector') is None for row in rows):
+        return None
+    
+    query_vec = np.asarray(embedding, dtype=np.float32)
+    query_vec = query_vec / (np.linalg.norm(query_vec) or 1.0)
+    rescored = []
+    for row in rows:
+        vector = np.asarray(row['vector'], dtype=np.float32)
+        cosine = float(query_vec @ vector) / (float(np.linalg.norm(vector)) or 1.0)
+        score = (1.0 + cosine) / 2.0
+        
+        row = _strip_vector(row)
+        row['score'] = score
+        if isinstance(row.get('metadata'), dict):
+            row['metadata'] = dict(row['metadata'], score=score)
+        rescored.append(row)
+    
+    rescored.sort(key=lambda row: row['score'], reverse=True)
+    return rescored
+
+
 class SemanticSearcher:
-    def __init__(self):
-        # Initialize OpenAI client
-        self.openai_client = openai.OpenAI(
-            api_key=os.getenv('OPENAI_API_KEY')
-        )
+    def __init__(self, similarity_threshold=None, cache_size=1000,
+                 embedding_cache_path=None):
+        """
+        Args:
+            similarity_threshold: Cosine similarity above which a previous query's
+                results are reused, rescored against the new query, instead of querying
+                Neo4j again. None (the default) disables result reuse; only enable it
+                where near-identical inputs such as "Stage II" and "Stage III" may share results
+            cache_size: Maximum cached queries per search type and top_k
+            embedding_cache_path: SQLite file for persisted query embeddings. Defaults to
+                EMBEDDING_CACHE_PATH, else DEFAULT_EMBEDDING_CACHE_PATH; pass '' to disable
+        """
+        # Set by get_searcher; the shared instance ignores close()
+        self._shared = False
+        
+        # Shared OpenAI client
+        self.openai_client = _openai_client()
         
         # Initialize Neo4j driver
         self.driver = GraphDatabase.driver(
             os.getenv('NEO4J_URI'),
             auth=(os.getenv('NEO4J_USERNAME'), os.getenv('NEO4J_PASSWORD'))
         )
+        
+        # Similarity caches keyed by (search type, top_k, definition length)
+        self.similarity_threshold = similarity_threshold
+        self.cache_size = cache_size
+        self._result_caches = {}
+        self._cache_lock = threading.Lock()
+        
+        # Async Neo4j drivers by event loop, created on first use in each loop
+        self._async_drivers = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+        
+        # Embeddings computed ahead of time by prime_embeddings
+        self._primed_embeddings = QueryCache(max_size=4096, ttl_seconds=3600)
+        
+        # Embeddings kept across runs
+        if embedding_cache_path is None:
+            embedding_cache_path = os.getenv('EMBEDDING_CACHE_PATH', DEFAULT_EMBEDDING_CACHE_PATH)
+        self.embedding_cache = None
+        if embedding_cache_path:
+            try:
+                self.embedding_cache = EmbeddingCache(embedding_cache_path)
+            except Exception as e:
+                print(f"Embedding cache disabled: {e}")
+    
+    def _known_embedding(self, text):
+        """Embedding for text from the primed or persisted caches, or None"""
+        primed = self._primed_embeddings.get(text)
+        if primed is not None:
+            return primed
+        
+        if self.embedding_cache:
+            return self.embedding_cache.get(EMBEDDING_MODEL, text)
+        return None
     
     def get_embedding(self, text: str) -> list:
         """
         Convert text to embedding vector using OpenAI's text-embedding-ada-002 model
         """
+        cached = self._known_embedding(text)
+        if cached is not None:
+            return cached
+        
         try:
             response = self.openai_client.embeddings.create(
                 input=text,
-                model="text-embedding-ada-002"
+                model=EMBEDDING_MODEL
             )
-            return response.data[0].embedding
+            embedding = response.data[0].embedding
         except Exception as e:
             print(f"Error generating embedding: {e}")
             return None
+        
+        if self.embedding_cache:
+            self.embedding_cache.put(EMBEDDING_MODEL, text, embedding)
+        return embedding
+
+    def _get_async_clients(self):
+        """
+        Return (AsyncOpenAI client, AsyncDriver) for the running event loop.
+        Both are bound to the loop that created them, so each loop gets its own.
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            driver = self._async_drivers.get(loop)
+            if driver is None:
+                driver = AsyncGraphDatabase.driver(
+                    os.getenv('NEO4J_URI'),
+                    auth=(os.getenv('NEO4J_USERNAME'), os.getenv('NEO4J_PASSWORD'))
+                )
+                self._async_drivers[loop] = driver
+        return _async_openai_client(), driver
     
+    async def aget_embedding(self, text: str) -> list:
+        """
+        Async get_embedding; the embeddings request is awaited instead of blocking a thread
+        """
+        # The persisted cache is SQLite, so its reads and writes run off the event loop
+        cached = await asyncio.to_thread(self._known_embedding, text)
+        if cached is not None:
+            return cached
+        
+        client, _ = self._get_async_clients()
+        try:
+            response = await client.embeddings.create(
+                input=text,
+                model=EMBEDDING_MODEL
+            )
+            embedding = response.data[0].embedding
+        except Exception as e:
+            print(f"Error generating embedding: {e}")
+            return None
+        
+        if self.embedding_cache:
+            await asyncio.to_thread(self.embedding_cache.put, EMBEDDING_MODEL, text, embedding)
+        return embedding
+
+    def embed_many(self, texts, batch_size=2048):
+        """
+        Embed several texts with one embeddings request per batch_size texts
+        Returns:
+            np.ndarray of shape (len(texts), d) in float32, or None on error
+        """
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        vectors = []
+        try:
+            for start in range(0, len(texts), batch_size):
+                response = self.openai_client.embeddings.create(
+                    input=texts[start:start + batch_size],
+                    model=EMBEDDING_MODEL
+                )
+                # The API returns items with an index; keep them in input order
+                vectors.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        except Exception as e:
+            print(f"Error generating embeddings: {e}")
+            return None
+
+        return np.asarray(vectors, dtype=np.float32)
+
+    def prime_embeddings(self, texts):
+        """
+        Embed texts in bulk so later get_embedding calls for them skip the API
+        Returns:
+            Number of texts primed
+        """
+        texts = list(dict.fromkeys(texts))
+        vectors = self.embed_many(texts)
+        if vectors is None:
+            return 0
+
+        for text, vector in zip(texts, vectors):
+            self._primed_embeddings.put(text, vector.tolist())
+        return len(texts)
+
+    def _prepare_search(self, search_type, query, top_k, definition_length):
+        """
+        Return the query to run and the result cache to use, or None when
+        result reuse is disabled.
+        """
+        cache = None
+        if self.similarity_threshold is not None:
+            cache = self._result_cache(search_type, top_k, definition_length)
+            # Cached rows keep the matched node's vector so they can be rescored
+            query = query.replace("RETURN node.definition as text", "RETURN node.openai_embedding as vector, node.definition as text", 1)
+        if definition_length:
+            query = _DEFINITION_RE.sub(r'substring(\1.definition, 0, $definition_length)', query)
+        return query, cache
+    
+    def _vector_search(self, search_type, query, embedding, top_k, error_label, definition_length=None):
+        """
+        Run a vector search query. With similarity_threshold set, the results of an
+        earlier query whose embedding is at least that similar are reused, with
+        their scores recomputed for this embedding.
+        With definition_length set, definitions are cut to that many characters
+        by the database so the full text is never sent.
+        """
+        query, cache = self._prepare_search(search_type, query, top_k, definition_length)
+        if cache is not None:
+            cached = _rescore(cache.lookup(embedding), embedding)
+            if cached is not None:
+                return cached
+        
+        with self.driver.session() as session:
+            try:
+                result = session.run(query, top_k=top_k, embedding=embedding, definition_length=definition_length)
+                results = [record.data() for record in result]
+            except Exception as e:
+                print(f"Error executing {error_label}: {e}")
+                return []
+        
+        return _store_results(cache, search_type, embedding, results)
+    
+    async def _avector_search(self, search_type, query, embedding, top_k, error_label, definition_length=None):
+        """Async _vector_search, sharing its result caches"""
+        query, cache = self._prepare_search(search_type, query, top_k, definition_length)
+        if cache is not None:
+            cached = _rescore(cache.lookup(embedding), embedding)
+            if cached is not None:
+                return cached
+        
+        _, driver = self._get_async_clients()
+        async with driver.session() as session:
+            try:
+                result = await session.run(query, top_k=top_k, embedding=embedding, definition_length=definition_length)
+                results = [record.data() async for record in result]
+            except Exception as e:
+                print(f"Error executing {error_label}: {e}")
+                return []
+        
+        return _store_results(cache, search_type, embedding, results)
+    
+    def _result_cache(self, search_type, top_k, definition_length):
+        """Similarity cache for one (search type, top_k, definition length)"""
+        cache_key = (search_type, top_k, definition_length)
+        with self._cache_lock:
+            cache = self._result_caches.get(cache_key)
+            if cache is None:
+                cache = SemanticCache(threshold=self.similarity_threshold, max_entries=self.cache_size)
+                self._result_caches[cache_key] = cache
+        return cache
+    
+    def clear_cache(self):
+        """Forget all cached search results"""
+        with self._cache_lock:
+            self._result_caches.clear()
+
     def cosine_similarity(self, vec1, vec2):
         if vec1 is None or vec2 is None:
             return 0
@@ -42,13 +389,14 @@ class SemanticSearcher:
         return float(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
 
     
-    def find_cde_from_pv_term(self, pv_term: str, top_k: int = 5):
+    def find_cde_from_pv_term(self, pv_term: str, top_k: int = 5, definition_length: int = None):
         """
         Search for CDEs by finding similar PV terms using semantic search
         
         Args:
             pv_term (str): The permissible value term to search for
             top_k (int): Number of top results to return
+            definition_length (int): Optional maximum length of returned definitions
             
         Returns:
             List of dictionaries containing PV and CDE information
@@ -58,38 +406,32 @@ class SemanticSearcher:
         if not embedding:
             return []
         
-        # Cypher query combining vector search with graph traversal
-        query = """
-        CALL db.index.vector.queryNodes('pvIndex', $top_k, $embedding) 
-        YIELD node, score
-        WHERE node:PV
-        WITH node, score
-        MATCH (node)<-[:HAS_PV]-(vdm:VDM)<-[:HAS_VDM]-(cde:CDE)
-        RETURN node.definition as text, score,
-               {score: score, 
-                pv_code: node.code, 
-                pv_term: node.term,
-                cde: cde.code, 
-                cde_term: cde.term, 
-                cde_defn: cde.definition} as metadata
-        ORDER BY score DESC
-        """
+        return self.find_cde_from_pv_embedding(embedding, top_k, definition_length)
+    
+    def find_cde_from_pv_embedding(self, embedding, top_k: int = 5, definition_length: int = None):
+        """find_cde_from_pv_term for an already computed query embedding"""
+        return self._vector_search('pv', PV_TO_CDE_QUERY, embedding, top_k, "PV to CDE search", definition_length)
+    
+    async def afind_cde_from_pv_term(self, pv_term: str, top_k: int = 5, definition_length: int = None):
+        """Async find_cde_from_pv_term using the async OpenAI client and Neo4j driver"""
+        embedding = await self.aget_embedding(pv_term)
+        if not embedding:
+            return []
         
-        with self.driver.session() as session:
-            try:
-                result = session.run(query, top_k=top_k, embedding=embedding)
-                return [record.data() for record in result]
-            except Exception as e:
-                print(f"Error executing PV to CDE search: {e}")
-                return []
+        return await self.afind_cde_from_pv_embedding(embedding, top_k, definition_length)
     
-    def find_cde_from_ncit_term(self, ncit_term: str, top_k: int = 5):
+    async def afind_cde_from_pv_embedding(self, embedding, top_k: int = 5, definition_length: int = None):
+        """Async find_cde_from_pv_embedding"""
+        return await self._avector_search('pv', PV_TO_CDE_QUERY, embedding, top_k, "PV to CDE search", definition_length)
+    
+    def find_cde_from_ncit_term(self, ncit_term: str, top_k: int = 5, definition_length: int = None):
         """
         Search for CDEs by finding similar NCIT concepts using semantic search
         
         Args:
             ncit_term (str): The NCIT concept term to search for
             top_k (int): Number of top results to return
+            definition_length (int): Optional maximum length of returned definitions
             
         Returns:
             List of dictionaries containing NCIT, PV, and CDE information
@@ -99,34 +441,25 @@ class SemanticSearcher:
         if not embedding:
             return []
         
-        # Cypher query combining vector search with graph traversal
-        query = """
-        CALL db.index.vector.queryNodes('ncitIndex', $top_k, $embedding) 
-        YIELD node, score
-        WHERE node:NCIT
-        WITH node, score
-        MATCH (node)<-[:HAS_CONCEPT]-(pv:PV)
-        OPTIONAL MATCH (pv)<-[:HAS_PV]-(vdm:VDM)<-[:HAS_VDM]-(cde:CDE)
-        WITH collect(cde.code) as cdes, node, pv, score
-        RETURN node.definition as text, score,
-               {score: score, 
-                concept_code: node.code, 
-                concept_term: node.term,
-                pv_code: pv.code, 
-                pv_term: pv.term,
-                of_cdes: cdes} as metadata
-        ORDER BY score DESC
-        """
+        return self.find_cde_from_ncit_embedding(embedding, top_k, definition_length)
+    
+    def find_cde_from_ncit_embedding(self, embedding, top_k: int = 5, definition_length: int = None):
+        """find_cde_from_ncit_term for an already computed query embedding"""
+        return self._vector_search('ncit', NCIT_TO_CDE_QUERY, embedding, top_k, "NCIT to CDE search", definition_length)
+    
+    async def afind_cde_from_ncit_term(self, ncit_term: str, top_k: int = 5, definition_length: int = None):
+        """Async find_cde_from_ncit_term using the async OpenAI client and Neo4j driver"""
+        embedding = await self.aget_embedding(ncit_term)
+        if not embedding:
+            return []
         
-        with self.driver.session() as session:
-            try:
-                result = session.run(query, top_k=top_k, embedding=embedding)
-                return [record.data() for record in result]
-            except Exception as e:
-                print(f"Error executing NCIT to CDE search: {e}")
-                return []
+        return await self.afind_cde_from_ncit_embedding(embedding, top_k, definition_length)
+    
+    async def afind_cde_from_ncit_embedding(self, embedding, top_k: int = 5, definition_length: int = None):
+        """Async find_cde_from_ncit_embedding"""
+        return await self._avector_search('ncit', NCIT_TO_CDE_QUERY, embedding, top_k, "NCIT to CDE search", definition_length)
     
-    def find_cde_by_definition_similarity(self, description: str, top_k: int = 5):
+    def find_cde_by_definition_similarity(self, description: str, top_k: int = 5, definition_length: int = None):
         """
         Specialized version of definition finder that searches only CDE definitions for similarity.
         Useful when you specifically need Common Data Elements.
@@ -134,6 +467,7 @@ class SemanticSearcher:
         Args:
             description (str): Description of the data element you're looking for
             top_k (int): Number of top results to return
+            definition_length (int): Optional maximum length of returned definitions
             
         Returns:
             List of dictionaries containing CDE information
@@ -157,15 +491,9 @@ class SemanticSearcher:
         ORDER BY score DESC
         """
         
-        with self.driver.session() as session:
-            try:
-                result = session.run(query, top_k=top_k, embedding=embedding)
-                return [record.data() for record in result]
-            except Exception as e:
-                print(f"Error executing CDE definition similarity search: {e}")
-                return []
+        return self._vector_search('cde_definition', query, embedding, top_k, "CDE definition similarity search", definition_length)
     
-    def find_ncit_by_definition_similarity(self, description: str, top_k: int = 5):
+    def find_ncit_by_definition_similarity(self, description: str, top_k: int = 5, definition_length: int = None):
         """
         Specialized version of the definition finder that searches only NCIT concept definitions for similarity.
         Useful when you specifically need standardized medical concepts.
@@ -173,6 +501,7 @@ class SemanticSearcher:
         Args:
             description (str): Description of the medical concept you're looking for
             top_k (int): Number of top results to return
+            definition_length (int): Optional maximum length of returned definitions
             
         Returns:
             List of dictionaries containing NCIT concept information
@@ -196,13 +525,7 @@ class SemanticSearcher:
         ORDER BY score DESC
         """
         
-        with self.driver.session() as session:
-            try:
-                result = session.run(query, top_k=top_k, embedding=embedding)
-                return [record.data() for record in result]
-            except Exception as e:
-                print(f"Error executing NCIT definition similarity search: {e}")
-                return []
+        return self._vector_search('ncit_definition', query, embedding, top_k, "NCIT definition similarity search", definition_length)
 
 
     def rerank_with_oc_context(self, candidates, input_embedding):
@@ -257,33 +580,42 @@ class SemanticSearcher:
         if not embedding:
             return []
         
-        # Cypher query combining vector search with graph traversal
-        query = """
-        CALL db.index.vector.queryNodes('pvIndex', $top_k, $embedding) 
-        YIELD node, score
-        WHERE node:PV
-        WITH node, score
-        MATCH (node)<-[:HAS_PV]-(vdm:VDM)<-[:HAS_VDM]-(cde:CDE)
-        RETURN node.definition as text, score,
-               {score: score, 
-                pv_code: node.code, 
-                pv_term: node.term,
-                cde: cde.code, 
-                cde_term: cde.term, 
-                cde_defn: cde.definition} as metadata
-        ORDER BY score DESC
-        """
-        
-        with self.driver.session() as session:
-            try:
-                results = [record.data() for record in session.run(query, top_k=top_k, embedding=embedding)]
-                return self.rerank_with_oc_context(results, embedding)
-            except Exception as e:
-                print(f"Error executing PV to CDE search: {e}")
-                return []
+        results = self._vector_search('pv', PV_TO_CDE_QUERY, embedding, top_k, "PV to CDE search")
+        # Re-ranking annotates the candidates, so work on a copy of the cached results
+        return self.rerank_with_oc_context(copy.deepcopy(results), embedding)
 
     def close(self):
-        """Close the Neo4j driver connection"""
+        """Close the Neo4j driver connection, unless this is the shared searcher"""
+        if self._shared:
+            return
+        self._release()
+    
+    def _release(self):
         self.driver.close()
+        if self.embedding_cache:
+            self.embedding_cache.close()
+    
+    async def aclose(self):
+        """
+        Close the async Neo4j driver and AsyncOpenAI client of the running event
+        loop, if they were created. Other loops keep theirs. Call it before the
+        loop that used the async searches ends; both are recreated on next use.
+        """
+        with self._async_lock:
+            driver = self._async_drivers.pop(asyncio.get_running_loop(), None)
+        if driver is not None:
+            await driver.close()
+        await _aclose_async_openai()
         
 
+
+@functools.lru_cache(maxsize=1)
+def get_searcher():
+    """
+    Return the process-wide SemanticSearcher. Its close() is a no-op, so
+    callers can close it as usual; it is released at interpreter exit.
+    """
+    searcher = SemanticSearcher()
+    searcher._shared = True
+    atexit.register(searcher._release)
+    return searcher
@@ -1,10 +1,12 @@
 # streamlit_multipage_app.py
 import streamlit as st
 import os
+import hashlib
+import re
 from datetime import datetime
+import pandas as pd
 
-# Import your existing agent - no changes needed to your agent code
-from llm_agent_4o import create_fresh_agent, map_raw_data_isolated
+from utils.data_manager import save_training_data
 
 # Configure page
 st.set_page_config(
@@ -14,6 +16,14 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Environment variables do not change while the server runs, so check them once
+_ENV_STATUS = {
+    "neo4j": bool(os.getenv("NEO4J_URI")),
+    "openai": bool(os.getenv("OPENAI_API_KEY"))
+}
+_ENV_ICONS = {name: "✅" if ok else "❌" for name, ok in _ENV_STATUS.items()}
+_ENV_READY = all(_ENV_STATUS.values())
+
 # Initialize session state
 def initialize_session_state():
     if 'search_results' not in st.session_state:
@@ -24,8 +34,87 @@ def initialize_session_state():
         st.session_state.agent_executor = None
     if 'system_prompt' not in st.session_state:
         st.session_state.system_prompt = None
-    if 'training_data' not in st.session_state:
-        st.session_state.training_data = []
+    if 'training_entries' not in st.session_state:
+        st.session_state.training_entries = 0
+
+@st.cache_resource(show_spinner=False)
+def get_agent():
+    """Build the agent once per process and share it across sessions"""
+    # Imported here so LangChain/OpenAI load only when the agent is first needed
+    from llm_agent_4o import create_fresh_agent
+    return create_fresh_agent()
+
+@st.cache_resource(show_spinner=False)
+def get_searcher():
+    """Shared searcher used to embed queries for the semantic cache"""
+    from semantic_retrievers import get_searcher as shared_searcher
+    return shared_searcher()
+
+@st.cache_resource(show_spinner=False)
+def get_semantic_cache(prompt_hash: str):
+    """Semantic response cache, one per system prompt"""
+    from utils.semantic_cache import SemanticCache
+    # ada-002 scores unrelated medical terms around 0.7-0.8, so only near-identical
+    # wording is reused
+    return SemanticCache(threshold=0.97, path=f"semantic_cache_{prompt_hash[:8]}.sqlite")
+
+@st.cache_data(ttl=3600, max_entries=512, show_spinner=False)
+def cached_map(query: str, prompt_hash: str):
+    """Run the agent for a query; repeated queries are served from memory.
+
+    prompt_hash is part of the cache key so cached answers are dropped
+    whenever the system prompt changes. Paraphrased queries that embed
+    close to an earlier one are answered from the semantic cache.
+
+    Returns:
+        (response, original query) where original query is the earlier query
+        whose cached answer was reused, or None if the agent ran for this one
+    """
+    from llm_agent_4o import map_raw_data_isolated_stream
+    
+    semantic_cache = get_semantic_cache(prompt_hash)
+    embedding = get_searcher().get_embedding(query)
+    cached = semantic_cache.lookup_entry(embedding)
+    if cached is not None:
+        cached_query, cached_response, _ = cached
+        return cached_response, (cached_query if cached_query != query else None)
+
+    agent_executor, system_prompt = get_agent()
+    result = st.write_stream(map_raw_data_isolated_stream(agent_executor, system_prompt, query))
+    # Raise instead of returning so failed runs are not cached
+    if "Error processing mapping:" in result:
+        raise RuntimeError(result)
+
+    semantic_cache.add(query, embedding, result)
+    return result, None
+
+def get_prompt_hash():
+    """Hash of the current system prompt, used to key cached responses"""
+    return hashlib.md5(st.session_state.system_prompt.encode()).hexdigest()
+
+def run_search(query, label):
+    """Run the agent inside a status box; uncached runs stream their transcript into it"""
+    with st.status(label, expanded=True) as status:
+        result, cached_from = cached_map(query, get_prompt_hash())
+        status.update(label="Search complete", state="complete", expanded=False)
+    if cached_from is not None:
+        st.info(f"Answer reused from an earlier search for '{cached_from}', which closely matches this query.")
+    return result
+
+_RAW_RESPONSE_LIMIT = 50_000
+
+_TOOL_RE = re.compile(r"exact_match|fuzzy_match|semantic_search|synonym_finder", re.I)
+_THOUGHT_RE = re.compile(r'^Thought:[ \t]*(.+)$', re.M)
+
+@st.cache_data(show_spinner=False)
+def parse_response(result: str) -> dict:
+    """Parse an agent response once so every Live Mode tab can reuse it"""
+    _, sep, final = result.rpartition("Final Answer:")
+    if not sep:
+        final = None
+    thoughts = [thought.strip() for thought in _THOUGHT_RE.findall(result)]
+    tools_used = {match.lower() for match in _TOOL_RE.findall(result)}
+    return {"final": final, "thoughts": thoughts, "tools_used": tools_used}
 
 # CSS styling (simplified from your existing app)
 st.markdown(
@@ -50,18 +139,15 @@ def main():
         st.markdown("**Agent Status**")
         
         # Environment check
-        neo4j_status = "✅" if os.getenv("NEO4J_URI") else "❌"
-        openai_status = "✅" if os.getenv("OPENAI_API_KEY") else "❌"
-        
-        st.write(f"Neo4j: {neo4j_status}")
-        st.write(f"OpenAI: {openai_status}")
+        st.write(f"Neo4j: {_ENV_ICONS['neo4j']}")
+        st.write(f"OpenAI: {_ENV_ICONS['openai']}")
         
         # Initialize agent
         if st.button("🚀 Initialize Agent"):
-            if os.getenv("NEO4J_URI") and os.getenv("OPENAI_API_KEY"):
+            if _ENV_READY:
                 with st.spinner("Initializing..."):
                     try:
-                        agent_executor, system_prompt = create_fresh_agent()
+                        agent_executor, system_prompt = get_agent()
                         st.session_state.agent_executor = agent_executor
                         st.session_state.system_prompt = system_prompt
                         st.success("Agent ready!")
@@ -70,8 +156,8 @@ def main():
             else:
                 st.error("Missing environment variables")
         
-        agent_ready = "🟢 Ready" if st.session_state.agent_executor else "🔴 Not Ready"
-        st.write(f"Status: {agent_ready}")
+        agent_ready = bool(st.session_state.get('agent_executor'))
+        st.write(f"Status: {'🟢 Ready' if agent_ready else '🔴 Not Ready'}")
         
         st.markdown("---")
         
@@ -122,48 +208,43 @@ def show_home_page():
         if not st.session_state.agent_executor:
             st.error("Please initialize the agent first")
         else:
-            with st.spinner(f"Searching for '{query}'..."):
-                try:
-                    # Use your existing agent function
-                    result = map_raw_data_isolated(
-                        st.session_state.agent_executor,
-                        st.session_state.system_prompt,
-                        query
-                    )
-                    
-                    # Store results for other modes
-                    st.session_state.current_query = query
-                    st.session_state.search_results = {
-                        'agent_response': result,
-                        'query': query,
-                        'timestamp': datetime.now()
-                    }
-                    
-                    # Display quick result
-                    st.markdown("### Quick Result")
-                    
-                    # Extract key information (simplified version of your existing parser)
-                    if "Final Answer:" in result:
-                        final_section = result.split("Final Answer:")[-1]
-                        st.success("✅ Mapping found!")
-                        with st.expander("View Result Details"):
-                            st.text(final_section[:500] + "..." if len(final_section) > 500 else final_section)
-                    else:
-                        st.info("Search completed - view full results in other modes")
-                    
-                    # Quick links to other modes
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.button("🎯 Analyze in Training Mode"):
-                            st.session_state.mode_selection = "🎯 Training Mode"
-                            st.rerun()
-                    with col2:
-                        if st.button("🚀 View in Live Mode"):
-                            st.session_state.mode_selection = "🚀 Live Mode"
-                            st.rerun()
-                            
-                except Exception as e:
-                    st.error(f"Search failed: {str(e)}")
+            try:
+                # Use your existing agent function
+                result = run_search(query, f"Searching for '{query}'...")
+                
+                # Store results for other modes
+                st.session_state.current_query = query
+                st.session_state.search_results = {
+                    'agent_response': result,
+                    'query': query,
+                    'timestamp': datetime.now()
+                }
+                
+                # Display quick result
+                st.markdown("### Quick Result")
+                
+                # Extract key information (simplified version of your existing parser)
+                if "Final Answer:" in result:
+                    final_section = result.rpartition("Final Answer:")[2]
+                    st.success("✅ Mapping found!")
+                    with st.expander("View Result Details"):
+                        st.text(final_section[:500] + "..." if len(final_section) > 500 else final_section)
+                else:
+                    st.info("Search completed - view full results in other modes")
+                
+                # Quick links to other modes
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.button("🎯 Analyze in Training Mode"):
+                        st.session_state.mode_selection = "🎯 Training Mode"
+                        st.rerun()
+                with col2:
+                    if st.button("🚀 View in Live Mode"):
+                        st.session_state.mode_selection = "🚀 Live Mode"
+                        st.rerun()
+                        
+            except Exception as e:
+                st.error(f"Search failed: {str(e)}")
 
 def show_training_mode():
     st.title("🎯 Training Mode")
@@ -180,31 +261,28 @@ def show_training_mode():
         placeholder="e.g., patient age, chemotherapy regimen"
     )
     
-    if st.button("🔍 Search for Training") or st.session_state.get('search_results'):
+    search_clicked = st.button("🔍 Search for Training")
+    if search_clicked or st.session_state.get('search_results'):
         if query:
             # Perform search if new query
             if query != st.session_state.get('current_query') or not st.session_state.get('search_results'):
-                with st.spinner("Getting results for training..."):
-                    try:
-                        result = map_raw_data_isolated(
-                            st.session_state.agent_executor,
-                            st.session_state.system_prompt,
-                            query
-                        )
-                        
-                        st.session_state.current_query = query
-                        st.session_state.search_results = {
-                            'agent_response': result,
-                            'query': query,
-                            'timestamp': datetime.now()
-                        }
-                    except Exception as e:
-                        st.error(f"Search failed: {str(e)}")
-                        return
+                try:
+                    result = run_search(query, "Getting results for training...")
+                    
+                    st.session_state.current_query = query
+                    st.session_state.search_results = {
+                        'agent_response': result,
+                        'query': query,
+                        'timestamp': datetime.now()
+                    }
+                except Exception as e:
+                    st.error(f"Search failed: {str(e)}")
+                    return
             
             # Display training interface
             show_training_interface()
 
+@st.fragment
 def show_training_interface():
     if not st.session_state.get('search_results'):
         return
@@ -216,71 +294,64 @@ def show_training_interface():
     
     # Mock up some tool results for training interface
     # In reality, you'd parse these from your agent response
-    mock_results = [
-        {
-            'id': 'result_1',
-            'tool': 'exact_match',
-            'content': 'Found exact match: C3117 - Hypertension',
-            'score': 0.98
-        },
-        {
-            'id': 'result_2', 
-            'tool': 'semantic_search',
-            'content': 'Semantic match: C12971 - High Blood Pressure',
-            'score': 0.85
-        },
-        {
-            'id': 'result_3',
-            'tool': 'fuzzy_match',
-            'content': 'Similar term: C3222 - Blood Pressure Disorder',
-            'score': 0.72
-        }
-    ]
-    
-    st.markdown("**Select the most relevant results:**")
-    
-    # Display results with feedback options
-    selected_results = []
-    rejected_results = []
-    
-    for i, result_item in enumerate(mock_results):
-        with st.container():
-            st.markdown(f"""
-            <div class="training-result-card">
-                <strong>Tool:</strong> {result_item['tool']} | <strong>Score:</strong> {result_item['score']}<br>
-                <strong>Result:</strong> {result_item['content']}
-            </div>
-            """, unsafe_allow_html=True)
-            
-            col1, col2, col3 = st.columns([1, 1, 2])
-            
-            with col1:
-                if st.checkbox("✅ Relevant", key=f"select_{i}"):
-                    selected_results.append(result_item['id'])
-            
-            with col2:
-                if st.checkbox("❌ Not Relevant", key=f"reject_{i}"):
-                    rejected_results.append(result_item['id'])
-    
-    # Additional feedback
-    st.markdown("""
-    <div class="feedback-section">
-        <h4>Additional Feedback</h4>
-    </div>
-    """, unsafe_allow_html=True)
+    results_df = pd.DataFrame({
+        'id': ['result_1', 'result_2', 'result_3'],
+        'tool': ['exact_match', 'semantic_search', 'fuzzy_match'],
+        'content': [
+            'Found exact match: C3117 - Hypertension',
+            'Semantic match: C12971 - High Blood Pressure',
+            'Similar term: C3222 - Blood Pressure Disorder'
+        ],
+        'score': [0.98, 0.85, 0.72],
+        'relevant': False,
+        'not_relevant': False
+    })
     
-    col1, col2 = st.columns(2)
-    with col1:
-        overall_quality = st.selectbox("Overall result quality:", 
-                                     ["Excellent", "Good", "Fair", "Poor"])
-    with col2:
-        confidence_in_feedback = st.selectbox("Your confidence in this feedback:",
-                                            ["Very Confident", "Confident", "Somewhat Confident", "Not Confident"])
+    # Batch all feedback widgets so the script reruns once, on submit
+    with st.form("training_feedback", clear_on_submit=False):
+        st.markdown("**Select the most relevant results:**")
+        
+        # Render all results as one editable table instead of a widget pair per row
+        edited_df = st.data_editor(
+            results_df,
+            num_rows="fixed",
+            hide_index=True,
+            disabled=['id', 'tool', 'content', 'score'],
+            column_config={
+                'id': None,
+                'tool': st.column_config.TextColumn("Tool"),
+                'content': st.column_config.TextColumn("Result", width="large"),
+                'score': st.column_config.NumberColumn("Score", format="%.2f"),
+                'relevant': st.column_config.CheckboxColumn("✅ Relevant"),
+                'not_relevant': st.column_config.CheckboxColumn("❌ Not Relevant")
+            },
+            key=f"training_results_{query}"
+        )
+        
+        # Additional feedback
+        st.markdown("""
+        <div class="feedback-section">
+            <h4>Additional Feedback</h4>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            overall_quality = st.selectbox("Overall result quality:", 
+                                         ["Excellent", "Good", "Fair", "Poor"])
+        with col2:
+            confidence_in_feedback = st.selectbox("Your confidence in this feedback:",
+                                                ["Very Confident", "Confident", "Somewhat Confident", "Not Confident"])
+        
+        submitted = st.form_submit_button("💾 Save Training Data", type="primary")
     
     # Save training data
-    if st.button("💾 Save Training Data", type="primary"):
+    if submitted:
+        selected_results = edited_df.loc[edited_df['relevant'], 'id'].tolist()
+        rejected_results = edited_df.loc[edited_df['not_relevant'], 'id'].tolist()
+        
         training_entry = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': datetime.now(),
             'query': query,
             'selected_results': selected_results,
             'rejected_results': rejected_results,
@@ -289,8 +360,9 @@ def show_training_interface():
             'agent_response': st.session_state.search_results['agent_response']
         }
         
-        # Save to training data (you can implement file saving here)
-        st.session_state.training_data.append(training_entry)
+        # Same store as the Training Mode page, so its statistics include these entries
+        save_training_data(training_entry)
+        st.session_state.training_entries += 1
         
         st.success("✅ Training data saved! Thank you for your feedback.")
         
@@ -301,6 +373,7 @@ def show_training_interface():
             st.write(f"**Rejected Results:** {len(rejected_results)}")
             st.write(f"**Overall Quality:** {overall_quality}")
             st.write(f"**Your Confidence:** {confidence_in_feedback}")
+            st.write(f"**Entries Saved This Session:** {st.session_state.training_entries}")
 
 def show_live_mode():
     st.title("🚀 Live Mode")
@@ -317,31 +390,28 @@ def show_live_mode():
         placeholder="e.g., diabetes, C12971, blood glucose"
     )
     
-    if st.button("🔍 Search All Tools") or st.session_state.get('search_results'):
+    search_clicked = st.button("🔍 Search All Tools")
+    if search_clicked or st.session_state.get('search_results'):
         if query:
             # Perform search if new query
             if query != st.session_state.get('current_query') or not st.session_state.get('search_results'):
-                with st.spinner("Running comprehensive search..."):
-                    try:
-                        result = map_raw_data_isolated(
-                            st.session_state.agent_executor,
-                            st.session_state.system_prompt,
-                            query
-                        )
-                        
-                        st.session_state.current_query = query
-                        st.session_state.search_results = {
-                            'agent_response': result,
-                            'query': query,
-                            'timestamp': datetime.now()
-                        }
-                    except Exception as e:
-                        st.error(f"Search failed: {str(e)}")
-                        return
+                try:
+                    result = run_search(query, "Running comprehensive search...")
+                    
+                    st.session_state.current_query = query
+                    st.session_state.search_results = {
+                        'agent_response': result,
+                        'query': query,
+                        'timestamp': datetime.now()
+                    }
+                except Exception as e:
+                    st.error(f"Search failed: {str(e)}")
+                    return
             
             # Display live results
             show_live_results()
 
+@st.fragment
 def show_live_results():
     if not st.session_state.get('search_results'):
         return
@@ -351,14 +421,15 @@ def show_live_results():
     
     st.markdown(f"### Live Results for: **{query}**")
     
+    parsed = parse_response(result)
+    
     # Create tabs for different views
     tab1, tab2, tab3, tab4 = st.tabs(["🎯 Final Answer", "🔧 Tool Breakdown", "🧠 Agent Reasoning", "📄 Raw Response"])
     
     with tab1:
         st.markdown("#### Final Answer")
-        if "Final Answer:" in result:
-            final_section = result.split("Final Answer:")[-1]
-            st.success(final_section)
+        if parsed["final"] is not None:
+            st.success(parsed["final"])
         else:
             st.info("No final answer section found")
     
@@ -370,7 +441,7 @@ def show_live_results():
         
         for tool in tools:
             with st.expander(f"🔧 {tool} Results"):
-                if tool.lower().replace(" ", "_") in result.lower():
+                if tool.lower().replace(" ", "_") in parsed["tools_used"]:
                     # Extract relevant sections
                     st.text("Tool executed - check raw response for details")
                 else:
@@ -379,22 +450,20 @@ def show_live_results():
     with tab3:
         st.markdown("#### Agent Reasoning Process")
         
-        # Extract thought process
-        thoughts = []
-        lines = result.split('\n')
-        for line in lines:
-            if line.startswith('Thought:'):
-                thoughts.append(line)
-        
+        thoughts = parsed["thoughts"]
         if thoughts:
             for i, thought in enumerate(thoughts, 1):
-                st.markdown(f"**Step {i}:** {thought.replace('Thought:', '').strip()}")
+                st.markdown(f"**Step {i}:** {thought}")
         else:
             st.info("No explicit reasoning steps found")
     
     with tab4:
         st.markdown("#### Complete Agent Response")
-        st.code(result, language="text")
+        # Very long transcripts are capped to keep every rerun cheap to render
+        if len(result) > _RAW_RESPONSE_LIMIT:
+            st.code(result[:_RAW_RESPONSE_LIMIT] + "\n…truncated", language="text")
+        else:
+            st.code(result, language="text")
     
     # Export option
     if st.button("📁 Export Results"):
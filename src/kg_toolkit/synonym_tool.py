@@ -3,18 +3,29 @@ Simple Synonym Finder - Cancer Knowledge Graph
 Fetches all synonym data for a given term, code or permissible value
 """
 
-from neo4j import GraphDatabase
+from neo4j import RoutingControl
+import logging
 import os
 
+from utils.graph_driver import get_driver
+from utils.graph_schema import ensure_lookup_indexes
+
+logger = logging.getLogger(__name__)
+
 
 class get_synonyms:
     """
     Get all synonym data for a given input term or permissible value
     """
-    def __init__(self, uri, username, password):
-        """Initialize connection to Neo4j"""
-        self.driver = GraphDatabase.driver(uri, auth=(username, password))
-        print("Connected to database")
+    def __init__(self, uri, username, password, driver=None):
+        """Initialize connection to Neo4j
+
+        Args:
+            driver: Optional driver to use instead of the shared one
+        """
+        self.driver = driver or get_driver(uri, username, password)
+        ensure_lookup_indexes(self.driver)
+        logger.debug("Connected to database")
     
     def get_synonyms_from_pv(self, pv):
         """ Find synonyms for a permissible value using PV -> NCIT -> SYN path
@@ -30,28 +41,22 @@ class get_synonyms:
         RETURN syn.term
         """
         
-        print(f"Finding synonyms for: '{pv}'")
-        print("=" * 50)
+        logger.debug("Finding synonyms for: '%s'", pv)
         
         try:
-            with self.driver.session() as session:
-                result = session.run(query, pv=pv)
-                synonyms = [record["syn.term"] for record in result if record["syn.term"]]
+            records = self.driver.execute_query(query, pv=pv, routing_=RoutingControl.READ).records
+            synonyms = [record["syn.term"] for record in records if record["syn.term"]]
             
             if not synonyms:
-                print("No synonyms found - term might not exist as a PV or have no exact matches for synonyms")
+                logger.debug("No synonyms found for '%s' - term might not exist as a PV or have no exact matches for synonyms", pv)
                 return []
             
-            print(f"Found {len(synonyms)} synonyms:")
-            print()
-
-            for i, synonym in enumerate(synonyms, 1):
-                print(f"  {i}. {synonym}")
+            logger.debug("Found %d synonyms for '%s'", len(synonyms), pv)
             
             return synonyms
             
         except Exception as e:
-            print(f"Query failed: {e}")
+            logger.error("Query failed: %s", e)
             return []
 
     def get_synonyms_from_termcode(self, code):
@@ -64,27 +69,22 @@ class get_synonyms:
         MATCH (n:NCIT {code: $code})-[:HAS_SYNONYM]->(syn:SYN)
         RETURN syn.term as synonym_term
         """
-        print("Finding synonyms for NCIT code: {code}")
-        print("=" * 50)
+        logger.debug("Finding synonyms for NCIT code: %s", code)
 
         try:
-            with self.driver.session() as session:
-                result = session.run(query, code=code)
-                synonyms = [record["synonym_term"] for record in result if record["synonym_term"]]
+            records = self.driver.execute_query(query, code=code, routing_=RoutingControl.READ).records
+            synonyms = [record["synonym_term"] for record in records if record["synonym_term"]]
             
             if not synonyms:
-                print(f"No synonyms found for NCIT code '{code}' - code might not exist or have no synonyms")
+                logger.debug("No synonyms found for NCIT code '%s' - code might not exist or have no synonyms", code)
                 return []
             
-            print(f"Found {len(synonyms)} synonyms:")
-            print()
-            for i, synonym in enumerate(synonyms, 1):
-                print(f"  {i}. {synonym}")
+            logger.debug("Found %d synonyms for NCIT code %s", len(synonyms), code)
             
             return synonyms
             
         except Exception as e:
-            print(f"Query failed: {e}")
+            logger.error("Query failed: %s", e)
             return []
 
         # consider semantic types to weigh matches 
@@ -1,13 +1,12 @@
-from neo4j import GraphDatabase
+from utils.graph_driver import get_driver
 import os
 
 def test_connection(uri, username, password):
     try:
-        driver = GraphDatabase.driver(uri, auth=(username, password))
+        driver = get_driver(uri, username, password)
         with driver.session() as session:
             result = session.run("RETURN 'Connection successful' AS message")
             print(result.single()["message"])
-        driver.close()
         return True
     except Exception as e:
         print(f"Connection failed: {e}")
@@ -19,4 +18,4 @@ if __name__ == "__main__":
     username=os.getenv("NEO4J_USERNAME")
     password=os.getenv("NEO4J_PASSWORD")    
     
-    test_connection(uri, username, password)
\ No newline at end of file
+    test_connection(uri, username, password)
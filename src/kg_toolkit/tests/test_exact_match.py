@@ -1,28 +1,49 @@
 #!/usr/bin/env python3
 from exact_match import get_node_match
+from utils.graph_driver import get_driver
+import argparse
+import re
 import sys
+import textwrap
 import os
 
+BATCH_SIZE = 100
+_CODE_RE = re.compile(r'^C\d+$', re.IGNORECASE)
+
+_BATCH_TERM_QUERY = """
+UNWIND $terms AS t
+MATCH (n:NCIT)
+WHERE toLower(n.term) = toLower(t)
+RETURN t AS query, n.code AS code, n.term AS term, n.type AS type
+"""
+
+_MENU = (
+    "\nChoose search method:\n"
+    "1. Search by NCIT Code - e.g., 'C40625'\n"
+    "2. Search by Term - e.g., 'Lung Carcinoma'\n"
+    "3. Fuzzy Search by Term - e.g., 'lung' (finds all terms containing 'lung')\n"
+    "4. Quit\n"
+)
+
+_SEARCH_TYPES = {'1': 'code', '2': 'term', '3': 'fuzzy', '4': 'quit'}
+
 def get_search_type():
+    sys.stdout.write(_MENU)
     while True:
-        print("\nChoose search method:")
-        print("1. Search by NCIT Code - e.g., 'C40625'")
-        print("2. Search by Term - e.g., 'Lung Carcinoma'")
-        print("3. Fuzzy Search by Term - e.g., 'lung' (finds all terms containing 'lung')")
-        print("4. Quit")
-        
         choice = input("\nEnter your choice (1, 2, 3, or 4): ").strip()
         
-        if choice == '1':
-            return 'code'
-        elif choice == '2':
-            return 'term'
-        elif choice == '3':
-            return 'fuzzy'
-        elif choice == '4':
-            return 'quit'
-        else:
-            print("Invalid choice. Please enter 1, 2, 3, or 4.")
+        search_type = _SEARCH_TYPES.get(choice)
+        if search_type:
+            return search_type
+        print("Invalid choice. Please enter 1, 2, 3, or 4.")
+
+def print_node(node):
+    """Print the fields of an exact match"""
+    print(f"Code: {node['code']}")
+    print(f"Term: {node['term']}")
+    print(f"Type: {node['type']}")
+    definition = node['definition']
+    print(f"Definition: {textwrap.shorten(definition, width=100, placeholder='...') if definition else 'Not available'}")
 
 def search_by_code(matcher):
     code = input("Enter an NCIT code to search for: ").strip()
@@ -32,11 +53,11 @@ def search_by_code(matcher):
         return False
     
     print()
-    result = matcher.get_exact_match_from_code(code.upper())
+    result = matcher.get_exact_match_from_code(code.upper(), display_only=True)
     
     if result:
-        print()
         print(f"Found exact match for NCIT code '{code.upper()}'")
+        print_node(result)
     else:
         print(f"No exact match found for NCIT code '{code.upper()}'")
     
@@ -50,11 +71,11 @@ def search_by_term(matcher):
         return False
     
     print()
-    result = matcher.get_exact_match_from_term(term)
+    result = matcher.get_exact_match_from_term(term, display_only=True)
     
     if result:
-        print()
         print(f"Found exact match for term '{term}'")
+        print_node(result)
     else:
         print(f"No exact match found for term '{term}'")
     
@@ -103,9 +124,7 @@ def fuzzy_search_by_term(matcher):
             # Show definition with proper truncation
             definition = result['definition']
             if definition:
-                if len(definition) > 150:
-                    definition = definition[:147] + "..."
-                print(f"   Definition: {definition}")
+                print(f"   Definition: {textwrap.shorten(definition, width=150, placeholder='...')}")
             else:
                 print(f"   Definition: Not available")
         
@@ -124,10 +143,16 @@ def fuzzy_search_by_term(matcher):
                     print(f"\nGetting detailed info for: {selected_result['term']}")
                     print("=" * 60)
                     
-                    # Get full details using the exact match function
-                    detailed_result = matcher.get_exact_match_from_code(selected_result['code'])
-                    if detailed_result:
-                        print(f"Retrieved detailed information for '{selected_result['term']}'")
+                    # The fuzzy row already carries the node fields; only go back
+                    # to the database when the definition is missing
+                    detailed_result = selected_result
+                    if not selected_result.get('definition'):
+                        detailed_result = matcher.get_exact_match_from_code(selected_result['code']) or selected_result
+                    
+                    print(f"Code: {detailed_result['code']}")
+                    print(f"Term: {detailed_result['term']}")
+                    print(f"Type: {detailed_result['type']}")
+                    print(f"Definition: {detailed_result['definition'] or 'Not available'}")
                     break
                 else:
                     print(f"Please enter a number between 1 and {len(results)}")
@@ -147,7 +172,51 @@ def fuzzy_search_by_term(matcher):
     
     return True
 
+def _batch_key(value):
+    """Codes are matched upper-cased, terms as written"""
+    return value.upper() if _CODE_RE.match(value) else value
+
+def _read_records(tx, query, **params):
+    return [record.data() for record in tx.run(query, **params)]
+
+def batch_search(matcher, path):
+    """
+    Look up every code or term listed in a file, one per line.
+    Values are sent in chunks of BATCH_SIZE, so each chunk costs a single
+    round trip instead of one query per value.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        values = [line.strip() for line in f if line.strip()]
+    
+    codes = [_batch_key(value) for value in values if _CODE_RE.match(value)]
+    terms = [value for value in values if not _CODE_RE.match(value)]
+    
+    found = {}
+    for start in range(0, len(codes), BATCH_SIZE):
+        found.update(matcher.get_exact_matches_from_codes(codes[start:start + BATCH_SIZE]))
+    
+    with matcher.driver.session() as session:
+        for start in range(0, len(terms), BATCH_SIZE):
+            chunk = terms[start:start + BATCH_SIZE]
+            for record in session.execute_read(_read_records, _BATCH_TERM_QUERY, terms=chunk):
+                found.setdefault(record['query'], record)
+    
+    matched = 0
+    for value in values:
+        record = found.get(_batch_key(value))
+        if record:
+            matched += 1
+            print(f"{value}\t{record['code']}\t{record['term']}\t{record['type']}")
+        else:
+            print(f"{value}\tNo exact match found")
+    
+    print(f"\nMatched {matched} of {len(values)} values")
+
 def main():
+    parser = argparse.ArgumentParser(description="Node Matcher test")
+    parser.add_argument("--batch", metavar="FILE", help="file with one NCIT code or term per line; runs non-interactively")
+    args = parser.parse_args()
+    
     NEO4J_URI = os.getenv("NEO4J_URI")  
     NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")             
     NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")         
@@ -163,10 +232,16 @@ def main():
     
     try:
         print("Connecting to Neo4j database...")
-        matcher = get_node_match(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+        # Share one pooled driver so each lookup reuses an open connection
+        driver = get_driver(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+        matcher = get_node_match(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, driver=driver)
         print("Connection successful!")
         print()
         
+        if args.batch:
+            batch_search(matcher, args.batch)
+            return
+        
         while True:
             print("-" * 60)
             
@@ -4,7 +4,14 @@ Testing script to compare baseline vs context-aware semantic search
 for PV -> CDE mapping.
 """
 
-from semantic_retrievers import SemanticSearcher
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+
+def get_searcher():
+    """Return the shared searcher so repeated main() calls reuse its clients"""
+    # Imported here so the OpenAI/Neo4j clients load only when the test runs
+    from semantic_retrievers import get_searcher as shared_searcher
+    return shared_searcher()
 
 def print_separator():
     print("=" * 80)
@@ -34,14 +41,12 @@ def print_results(results, title):
         if oc_term:
             print(f"  Object Class: {oc_term}")
 
-        definition = result['text']
-        if len(definition) > 100:
-            definition = definition[:97] + "..."
+        definition = textwrap.shorten(result['text'] or "", width=100, placeholder="...")
         print(f"  Definition: {definition}")
 
 def main():
     print("Initializing semantic searcher for context-aware testing...\n")
-    searcher = SemanticSearcher()
+    searcher = get_searcher()
 
     try:
         while True:
@@ -53,12 +58,14 @@ def main():
             top_k = input("Number of results to display (default 5): ").strip()
             top_k = int(top_k) if top_k.isdigit() else 5
 
-            print("\nRunning baseline search...")
-            baseline_results = searcher.find_cde_from_pv_term(search_term, top_k=top_k)
-            print_results(baseline_results, "Baseline Search Results")
+            # Both searches are independent reads, so run them side by side
+            print("\nRunning baseline and context-aware searches...")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                baseline_future = executor.submit(searcher.find_cde_from_pv_term, search_term, top_k=top_k)
+                context_future = executor.submit(searcher.contextaware_cde_from_pv, search_term, top_k=top_k)
+                baseline_results, context_results = baseline_future.result(), context_future.result()
 
-            print("\nRunning context-aware search...")
-            context_results = searcher.contextaware_cde_from_pv(search_term, top_k=top_k)
+            print_results(baseline_results, "Baseline Search Results")
             print_results(context_results, "Context-Aware Search Results")
 
             print("\n" + "-" * 80)
@@ -68,9 +75,7 @@ def main():
 
     except KeyboardInterrupt:
         print("\nInterrupted. Exiting.")
-    finally:
-        searcher.close()
-        print("Database connection closed.")
+    # The shared searcher is released at interpreter exit, so it is not closed here
 
 if __name__ == "__main__":
     main()
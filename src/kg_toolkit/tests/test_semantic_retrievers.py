@@ -7,7 +7,8 @@ the semantic infrastructure database using PV, NCIT, and definition similarity s
 """
 
 import sys
-from semantic_retrievers import SemanticSearcher
+from semantic_retrievers import get_searcher
+from utils.query_cache import QueryCache
 
 def print_separator():
     """Print a visual separator line"""
@@ -208,12 +209,20 @@ def show_examples(search_type):
         for i, example in enumerate(examples[search_type], 1):
             print(f"   {i}. \"{example}\"")
 
+# Searcher method and result printer for each menu choice
+SEARCHES = {
+    '1': ('find_cde_from_pv_term', print_pv_results),
+    '2': ('find_cde_from_ncit_term', print_ncit_results),
+    '3': ('find_cde_by_definition_similarity', print_cde_definition_results),
+    '4': ('find_ncit_by_definition_similarity', print_ncit_definition_results)
+}
+
 def main():
     """Main interactive loop"""
     print("Initializing SI-Tamer Enhanced Semantic Search...")
     
     try:
-        searcher = SemanticSearcher()
+        searcher = get_searcher()
         print("Connected to database successfully!")
     except Exception as e:
         print(f"Failed to initialize searcher: {e}")
@@ -224,6 +233,9 @@ def main():
         print("   - NEO4J_PASSWORD")
         return
     
+    # Repeated searches skip both the embedding call and the database query
+    cache = QueryCache(max_size=2000, ttl_seconds=600)
+    
     try:
         while True:
             choice = get_search_choice()
@@ -241,25 +253,15 @@ def main():
             print(f"\nSearching... (generating embeddings and querying database)")
             
             try:
-                if choice == '1':
-                    # PV Search
-                    results = searcher.find_cde_from_pv_term(search_term, top_k=result_count)
-                    print_pv_results(results, search_term)
-                    
-                elif choice == '2':
-                    # NCIT Search
-                    results = searcher.find_cde_from_ncit_term(search_term, top_k=result_count)
-                    print_ncit_results(results, search_term)
-                    
-                elif choice == '3':
-                    # CDE Definition Search
-                    results = searcher.find_cde_by_definition_similarity(search_term, top_k=result_count)
-                    print_cde_definition_results(results, search_term)
-                    
-                elif choice == '4':
-                    # NCIT Definition Search
-                    results = searcher.find_ncit_by_definition_similarity(search_term, top_k=result_count)
-                    print_ncit_definition_results(results, search_term)
+                method_name, print_results = SEARCHES[choice]
+                cache_key = (choice, search_term.lower().strip(), result_count)
+                
+                results = cache.get(cache_key)
+                if results is None:
+                    # Results are only displayed, so let the database shorten the definitions
+                    results = getattr(searcher, method_name)(search_term, top_k=result_count, definition_length=200)
+                    cache.put(cache_key, results)
+                print_results(results, search_term)
                 
                 # Show search statistics
                 if choice in ['1', '2', '3', '4']:
@@ -291,8 +293,9 @@ def main():
     except Exception as e:
         print(f"\nAn error occurred: {e}")
     finally:
-        searcher.close()
-        print("Database connection closed.")
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses (hit rate {stats['hit_rate']:.0%})")
+        # The shared searcher is released at interpreter exit, so it is not closed here
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
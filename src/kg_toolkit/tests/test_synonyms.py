@@ -7,6 +7,11 @@ from synonym_tool import get_synonyms
 import sys
 import os
 
+def print_synonyms(synonyms):
+    """Print a numbered list of synonyms"""
+    for i, synonym in enumerate(synonyms, 1):
+        print(f"  {i}. {synonym}")
+
 def get_search_type():
     """Get user's choice for search type"""
     while True:
@@ -38,8 +43,9 @@ def search_by_pv(synonym_finder):
     synonyms = synonym_finder.get_synonyms_from_pv(pv_term)
     
     if synonyms:
+        print(f"Found {len(synonyms)} synonyms for PV '{pv_term}':")
         print()
-        print(f"Found {len(synonyms)} synonyms for PV '{pv_term}'")
+        print_synonyms(synonyms)
     else:
         print(f"No synonyms found for PV '{pv_term}'")
     
@@ -57,8 +63,9 @@ def search_by_code(synonym_finder):
     synonyms = synonym_finder.get_synonyms_from_termcode(code.upper())
     
     if synonyms:
+        print(f"Found {len(synonyms)} synonyms for NCIT code '{code.upper()}':")
         print()
-        print(f"Found {len(synonyms)} synonyms for NCIT code '{code.upper()}'")
+        print_synonyms(synonyms)
     else:
         print(f"No synonyms found for NCIT code '{code.upper()}'")
     
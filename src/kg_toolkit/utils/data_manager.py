@@ -1,77 +1,194 @@
+import contextlib
+import hashlib
 import json
 import os
+import threading
 from datetime import datetime, date
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads within this process are serialized
+    fcntl = None
+
+_THREAD_LOCK = threading.Lock()
+
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """Hold an exclusive lock on path + '.lock' across threads and processes"""
+    with _THREAD_LOCK, open(path + '.lock', 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _dump_line(entry):
+    """Serialize one entry as a newline-terminated JSON line (bytes)"""
+    if orjson is not None:
+        return orjson.dumps(entry, default=str, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_DATACLASS)
+    return (json.dumps(entry, default=str) + '\n').encode('utf-8')
+
+
+def _load_line(line):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def _query_hash(query):
+    """Short, fixed-size key used to count distinct queries in the stats sidecar"""
+    return hashlib.blake2b((query or '').encode('utf-8'), digest_size=8).hexdigest()
+
+
+# Score used for the average confidence; anything else counts as 1
+CONFIDENCE_SCORES = {
+    'Very Confident': 4,
+    'Confident': 3,
+    'Somewhat Confident': 2,
+    'Not Confident': 1
+}
+
+
 class DataManager:
-    def __init__(self, data_dir="training_data"):
+    def __init__(self, data_dir="training_data", flush_interval=1):
+        """
+        Args:
+            data_dir: Directory holding the daily training data files
+            flush_interval: Number of entries buffered in memory before they are written
+        """
         self.data_dir = data_dir
+        self.flush_interval = max(1, flush_interval)
+        self._buffer = []
         os.makedirs(data_dir, exist_ok=True)
     
     def get_filename(self, date_obj=None):
         """Get filename for training data based on date"""
         if date_obj is None:
             date_obj = date.today()
-        return os.path.join(self.data_dir, f"training_data_{date_obj.strftime('%Y%m%d')}.json")
+        return os.path.join(self.data_dir, f"training_data_{date_obj.strftime('%Y%m%d')}.jsonl")
+    
+    def get_stats_filename(self, date_obj=None):
+        """Get filename of the running statistics kept next to a day's data"""
+        if date_obj is None:
+            date_obj = date.today()
+        return os.path.join(self.data_dir, f"stats_{date_obj.strftime('%Y%m%d')}.json")
     
     def save_entry(self, data):
         """Save a single training data entry"""
-        filename = self.get_filename()
-        
-        # Load existing data
-        existing_data = []
-        if os.path.exists(filename):
-            try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                existing_data = []
-        
-        # Append new data
-        existing_data.append(data)
+        self._buffer.append(data)
+        if len(self._buffer) >= self.flush_interval:
+            self.flush()
+    
+    def flush(self):
+        """Append buffered entries to today's file, one JSON object per line"""
+        if not self._buffer:
+            return
         
-        # Save back to file
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(existing_data, f, indent=2, default=str)
+        # Every DataManager writing today's file shares this lock, so the
+        # counters always match the lines in the data file
+        with _file_lock(self.get_stats_filename()):
+            sketch = self._load_sketch()
+            with open(self.get_filename(), 'ab') as f:
+                f.write(b''.join(_dump_line(entry) for entry in self._buffer))
+            
+            for entry in self._buffer:
+                self._add_to_sketch(sketch, entry)
+            self._save_sketch(sketch)
+        self._buffer = []
+    
+    def close(self):
+        """Write any entries still buffered"""
+        self.flush()
     
     def load_data(self, date_obj=None):
         """Load training data for a specific date"""
+        self.flush()
         filename = self.get_filename(date_obj)
         
-        if os.path.exists(filename):
+        if not os.path.exists(filename):
+            return []
+        
+        entries = []
+        with open(filename, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(_load_line(line))
+                except ValueError:
+                    # Skip a partially written line rather than losing the whole day
+                    continue
+        return entries
+    
+    @staticmethod
+    def _add_to_sketch(sketch, entry):
+        """Fold one entry into the running counters"""
+        sketch['count'] += 1
+        sketch['confidence_sum'] += CONFIDENCE_SCORES.get(entry.get('confidence'), 1)
+        
+        quality = entry.get('overall_quality') or 'Unknown'
+        sketch['quality'][quality] = sketch['quality'].get(quality, 0) + 1
+        sketch['query_hashes'].add(_query_hash(entry.get('query')))
+    
+    def _load_sketch(self, date_obj=None):
+        """Read a day's running counters, rebuilding them from the data file if missing"""
+        stats_file = self.get_stats_filename(date_obj)
+        if os.path.exists(stats_file):
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                return []
-        return []
+                with open(stats_file, 'r', encoding='utf-8') as f:
+                    sketch = json.load(f)
+                # Older sidecars held the raw query list, or no query keys at all
+                if 'queries' in sketch:
+                    sketch['query_hashes'] = [_query_hash(q) for q in sketch.pop('queries')]
+                if 'query_hashes' in sketch:
+                    sketch['query_hashes'] = set(sketch['query_hashes'])
+                    return sketch
+            except (OSError, ValueError):
+                pass
+        
+        sketch = {'count': 0, 'confidence_sum': 0, 'quality': {}, 'query_hashes': set()}
+        data_file = self.get_filename(date_obj)
+        if os.path.exists(data_file):
+            with open(data_file, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        self._add_to_sketch(sketch, _load_line(line))
+                    except ValueError:
+                        continue
+        return sketch
+    
+    def _save_sketch(self, sketch, date_obj=None):
+        stats_file = self.get_stats_filename(date_obj)
+        tmp_file = stats_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(dict(sketch, query_hashes=sorted(sketch['query_hashes'])), f)
+        os.replace(tmp_file, stats_file)
     
     def get_statistics(self):
         """Get training data statistics"""
-        today_data = self.load_data()
+        self.flush()
+        sketch = self._load_sketch()
         
         stats = {
-            'entries_today': len(today_data),
-            'total_queries': len(set(entry.get('query', '') for entry in today_data)),
+            'entries_today': sketch['count'],
+            'total_queries': len(sketch['query_hashes']),
             'avg_confidence': 0,
             'quality_distribution': {}
         }
         
-        if today_data:
-            # Calculate average confidence
-            confidence_map = {
-                'Very Confident': 4,
-                'Confident': 3,
-                'Somewhat Confident': 2,
-                'Not Confident': 1
-            }
-            
-            confidences = [confidence_map.get(entry.get('confidence', 'Not Confident'), 1) for entry in today_data]
-            stats['avg_confidence'] = round(sum(confidences) / len(confidences), 2)
-            
-            # Quality distribution
-            qualities = [entry.get('overall_quality', 'Unknown') for entry in today_data]
-            stats['quality_distribution'] = {q: qualities.count(q) for q in set(qualities)}
+        if sketch['count']:
+            stats['avg_confidence'] = round(sketch['confidence_sum'] / sketch['count'], 2)
+            stats['quality_distribution'] = dict(sketch['quality'])
         
         return stats
 
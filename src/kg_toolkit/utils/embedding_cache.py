@@ -0,0 +1,54 @@
+"""
+Persistent embedding cache
+Stores embedding vectors in SQLite so repeated texts skip the embeddings API
+"""
+import hashlib
+import sqlite3
+import threading
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Embeddings keyed by sha256(model + text), stored as float32 blobs
+    """
+    def __init__(self, path=".embedding_cache.sqlite"):
+        """
+        Args:
+            path: SQLite file holding the cached vectors
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(model, text):
+        return hashlib.sha256((model + text).encode('utf-8')).hexdigest()
+
+    def get(self, model, text):
+        """Return the cached embedding as a list of floats, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector FROM embeddings WHERE key = ?", (self._key(model, text),)
+            ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def put(self, model, text, embedding):
+        """Store an embedding for text"""
+        blob = np.asarray(embedding, dtype=np.float32).tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                (self._key(model, text), blob)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
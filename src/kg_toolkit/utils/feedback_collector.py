@@ -1,5 +1,6 @@
 import json
 import os
+from collections import Counter
 from datetime import datetime, date
 import pandas as pd
 
@@ -52,7 +53,7 @@ class DataManager:
         
         stats = {
             'entries_today': len(today_data),
-            'total_queries': len(set(entry.get('query', '') for entry in today_data)),
+            'total_queries': len(dict.fromkeys(entry.get('query', '') for entry in today_data)),
             'avg_confidence': 0,
             'quality_distribution': {}
         }
@@ -70,8 +71,7 @@ class DataManager:
             stats['avg_confidence'] = round(sum(confidences) / len(confidences), 2)
             
             # Quality distribution
-            qualities = [entry.get('overall_quality', 'Unknown') for entry in today_data]
-            stats['quality_distribution'] = {q: qualities.count(q) for q in set(qualities)}
+            stats['quality_distribution'] = dict(Counter(entry.get('overall_quality', 'Unknown') for entry in today_data))
         
         return stats
 
@@ -0,0 +1,36 @@
+"""
+Shared Neo4j driver
+One connection pool per set of credentials, closed at interpreter exit
+"""
+import atexit
+import functools
+import os
+
+from neo4j import GraphDatabase
+
+MAX_CONNECTION_POOL_SIZE = 50
+CONNECTION_ACQUISITION_TIMEOUT = 30
+
+
+@functools.lru_cache(maxsize=4)
+def _create_driver(uri, username, password):
+    driver = GraphDatabase.driver(
+        uri,
+        auth=(username, password),
+        max_connection_pool_size=MAX_CONNECTION_POOL_SIZE,
+        connection_acquisition_timeout=CONNECTION_ACQUISITION_TIMEOUT
+    )
+    atexit.register(driver.close)
+    return driver
+
+
+def get_driver(uri=None, username=None, password=None):
+    """
+    Return the process-wide driver for these credentials.
+    Missing arguments fall back to NEO4J_URI, NEO4J_USERNAME and NEO4J_PASSWORD.
+    """
+    return _create_driver(
+        uri or os.getenv("NEO4J_URI"),
+        username or os.getenv("NEO4J_USERNAME"),
+        password or os.getenv("NEO4J_PASSWORD")
+    )
@@ -0,0 +1,39 @@
+"""
+Graph schema setup
+Makes sure the properties used for exact lookups are indexed
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Statements are idempotent; they back MATCH (n:NCIT {code: ...}) and MATCH (pv:PV {term: ...})
+LOOKUP_SCHEMA_STATEMENTS = [
+    "CREATE CONSTRAINT ncit_code_unique IF NOT EXISTS FOR (n:NCIT) REQUIRE n.code IS UNIQUE",
+    "CREATE INDEX pv_term_idx IF NOT EXISTS FOR (p:PV) ON (p.term)"
+]
+
+_lock = threading.Lock()
+_checked = False
+
+
+def ensure_lookup_indexes(driver):
+    """
+    Create the lookup constraint and index once per process.
+    Failures (e.g. read-only users or duplicate codes) are logged and the
+    lookups fall back to label scans.
+    """
+    global _checked
+    if _checked:
+        return
+
+    with _lock:
+        if _checked:
+            return
+        _checked = True
+
+        for statement in LOOKUP_SCHEMA_STATEMENTS:
+            try:
+                driver.execute_query(statement)
+            except Exception as e:
+                logger.warning("Could not apply '%s': %s", statement, e)
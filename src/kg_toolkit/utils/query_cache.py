@@ -0,0 +1,72 @@
+"""
+Query result cache
+Thread-safe LRU cache with per-entry expiry for search results
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+    """
+    Least-recently-used cache whose entries expire after ttl_seconds
+    """
+    def __init__(self, max_size=2000, ttl_seconds=600):
+        """
+        Args:
+            max_size: Maximum number of entries kept before the oldest is evicted
+            ttl_seconds: How long an entry stays valid after it is stored
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        """
+        Return the cached value for key, or None if it is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entry if full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry, e.g. after the underlying data has changed"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current hit rate"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0
+            }
+
+    def __len__(self):
+        return len(self._entries)
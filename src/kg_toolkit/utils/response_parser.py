@@ -2,6 +2,14 @@
 # utils/response_parser.py
 import re
 
+# Line prefixes that start a section of a ReAct trace
+_SECTION_KEYS = {
+    'Thought': 'thoughts',
+    'Action': 'actions',
+    'Observation': 'observations'
+}
+_PREFIXES = ('Thought:', 'Action:', 'Observation:', 'Final Answer:')
+
 def parse_agent_response_detailed(response):
     """Parse agent response for detailed analysis in live mode"""
     parsed = {
@@ -12,36 +20,54 @@ def parse_agent_response_detailed(response):
         'observations': []
     }
     
-    lines = response.split('\n')
-    current_section = None
     current_tool = None
     
-    for line in lines:
-        line = line.strip()
+    for line in map(str.strip, response.splitlines()):
+        # Blank lines and Action Input / free text need no further work
+        if not line.startswith(_PREFIXES):
+            continue
+        prefix, _, rest = line.partition(':')
         
-        if line.startswith('Thought:'):
-            parsed['thoughts'].append(line.replace('Thought:', '').strip())
+        if prefix == 'Final Answer':
+            # Always the text after the last marker, so only compute it once
+            if parsed['final_answer'] is None:
+                parsed['final_answer'] = response.rpartition('Final Answer:')[2].strip()
+            continue
         
-        elif line.startswith('Action:'):
-            action = line.replace('Action:', '').strip()
-            parsed['actions'].append(action)
-            current_tool = action
-            
-        elif line.startswith('Observation:'):
-            obs = line.replace('Observation:', '').strip()
-            parsed['observations'].append(obs)
-            
-            # Group observations by tool
-            if current_tool:
-                if current_tool not in parsed['tool_results']:
-                    parsed['tool_results'][current_tool] = []
-                parsed['tool_results'][current_tool].append(obs)
+        key = _SECTION_KEYS.get(prefix)
+        if key is None:
+            continue
         
-        elif line.startswith('Final Answer:'):
-            parsed['final_answer'] = response.split('Final Answer:')[-1].strip()
+        value = rest.strip()
+        parsed[key].append(value)
+        
+        if key == 'actions':
+            current_tool = value
+        elif key == 'observations' and current_tool:
+            # Group observations by tool
+            parsed['tool_results'].setdefault(current_tool, []).append(value)
     
     return parsed
 
+# Agent tool name -> category reported by extract_tool_mentions
+_TOOL_CATEGORIES = {
+    'term_matcher': 'exact_match',
+    'node_matcher': 'exact_match',
+    'semantic_pv_search': 'semantic_search',
+    'semantic_ncit_search': 'semantic_search',
+    'semantic_dual_search': 'semantic_search',
+    'semantic_cde_definition': 'semantic_search',
+    'semantic_ncit_definition': 'semantic_search',
+    'synonym_finder': 'synonym_finder',
+    'synonym_by_code': 'synonym_finder',
+    'fuzzy_term_matcher': 'fuzzy_match'
+}
+# Longest names first so no tool name is cut short by a shorter alternative
+_TOOL_ACTION_RE = re.compile(
+    r'action: (' + '|'.join(sorted(map(re.escape, _TOOL_CATEGORIES), key=len, reverse=True)) + ')',
+    re.IGNORECASE
+)
+
 def extract_tool_mentions(response):
     """Extract mentions of specific tools from response"""
     tools = {
@@ -51,17 +77,9 @@ def extract_tool_mentions(response):
         'synonym_finder': []
     }
     
-    # Look for tool-specific patterns in the response
-    if 'action: term_matcher' in response.lower() or  'action: node_matcher' in response.lower():
-        tools['exact_match'].append("Tool was used")
-    
-    if 'action: semantic_pv_search' in response.lower() or 'action: semantic_ncit_search' in response.lower() or 'action: semantic_cde_definition' in response.lower() or 'action: semantic_ncit_definition':
-        tools['semantic_search'].append("Tool was used")
-    
-    if 'action: synonym_finder' in response.lower() or 'action: synonym_by_code' in response.lower():
-        tools['synonym_finder'].append("Tool was used")
-    
-    if 'action: fuzzy_term_matcher' in response.lower():
-        tools['fuzzy_match'].append("Tool was used")
+    # Single pass over the response for every tool action
+    used = {_TOOL_CATEGORIES[m.lower()] for m in _TOOL_ACTION_RE.findall(response)}
+    for category in used:
+        tools[category].append("Tool was used")
     
-    return tools
\ No newline at end of file
+    return tools
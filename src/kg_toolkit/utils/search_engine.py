@@ -2,6 +2,9 @@ from llm_agent_4o import map_raw_data_isolated
 import re
 from datetime import datetime
 
+_CODE_RE = re.compile(r'([A-Z]\d+)')
+_CONF_RE = re.compile(r'Confidence[:\s]*(High|Medium|Low)', re.IGNORECASE)
+
 class SearchEngine:
     """Wrapper around your existing agent for consistent interface"""
     
@@ -38,16 +41,17 @@ class SearchEngine:
         }
         
         # Extract final answer
-        if "Final Answer:" in response:
-            parsed['final_answer'] = response.split("Final Answer:")[-1].strip()
+        _, sep, final_answer = response.rpartition("Final Answer:")
+        if sep:
+            parsed['final_answer'] = final_answer.strip()
         
         # Extract NCIT code patterns
-        code_match = re.search(r'([A-Z]\d+)', response)
+        code_match = _CODE_RE.search(response)
         if code_match:
             parsed['ncit_code'] = code_match.group(1)
         
         # Extract confidence if mentioned
-        conf_match = re.search(r'Confidence[:\s]*(High|Medium|Low)', response, re.IGNORECASE)
+        conf_match = _CONF_RE.search(response)
         if conf_match:
             parsed['confidence'] = conf_match.group(1)
         
@@ -0,0 +1,157 @@
+"""
+Semantic response cache
+Returns a stored response when a new query embeds close to a previous one
+"""
+import pickle
+import sqlite3
+import threading
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    In-memory cache of (query embedding, response) pairs, optionally
+    persisted to SQLite one row per entry. When max_entries is reached the
+    least recently used entry is overwritten.
+    """
+    def __init__(self, threshold=0.92, path=None, max_entries=1000):
+        """
+        Args:
+            threshold: Minimum cosine similarity for a cached response to be reused
+            path: Optional SQLite file used to persist entries across restarts
+            max_entries: Maximum number of entries kept in memory
+        """
+        self.threshold = threshold
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._queries = []
+        self._responses = []
+        self._last_used = []
+        self._clock = 0
+        self._conn = None
+
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(slot INTEGER PRIMARY KEY, query TEXT, vector BLOB, response BLOB, last_used INTEGER)"
+            )
+            self._conn.commit()
+            self._load()
+
+    @staticmethod
+    def _normalize(embedding):
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def lookup(self, embedding):
+        """
+        Find the cached response for the most similar stored query.
+
+        Args:
+            embedding: Embedding vector of the incoming query
+        Returns:
+            The cached response, or None if nothing is similar enough
+        """
+        entry = self.lookup_entry(embedding)
+        return entry[1] if entry is not None else None
+
+    def lookup_entry(self, embedding):
+        """
+        Like lookup, but also say which stored query matched.
+
+        Returns:
+            (stored query, cached response, similarity), or None if nothing is similar enough
+        """
+        if embedding is None:
+            return None
+
+        query_vec = self._normalize(embedding)
+        with self._lock:
+            if self._matrix is None:
+                return None
+            scores = self._matrix @ query_vec
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                self._clock += 1
+                self._last_used[best] = self._clock
+                if self._conn is not None:
+                    self._conn.execute("UPDATE entries SET last_used = ? WHERE slot = ?", (self._clock, best))
+                    self._conn.commit()
+                return self._queries[best], self._responses[best], float(scores[best])
+        return None
+
+    def add(self, query, embedding, response):
+        """Store a response under the query's embedding"""
+        if embedding is None:
+            return
+
+        row = self._normalize(embedding)
+        with self._lock:
+            self._clock += 1
+            if len(self._responses) >= self.max_entries:
+                # Full: overwrite the least recently used row in place
+                slot = int(np.argmin(self._last_used))
+                self._matrix[slot] = row
+                self._queries[slot] = query
+                self._responses[slot] = response
+                self._last_used[slot] = self._clock
+            else:
+                slot = len(self._responses)
+                if self._matrix is None:
+                    self._matrix = row[np.newaxis, :]
+                else:
+                    self._matrix = np.vstack([self._matrix, row])
+                self._queries.append(query)
+                self._responses.append(response)
+                self._last_used.append(self._clock)
+
+            if self._conn is not None:
+                # Only the changed row is written, not the whole cache
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (slot, query, vector, response, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (slot, query, row.tobytes(), pickle.dumps(response, protocol=pickle.HIGHEST_PROTOCOL), self._clock)
+                )
+                self._conn.commit()
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._matrix = None
+            self._queries = []
+            self._responses = []
+            self._last_used = []
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM entries")
+                self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self):
+        return len(self._responses)
+
+    def _load(self):
+        try:
+            rows = self._conn.execute(
+                "SELECT query, vector, response, last_used FROM entries ORDER BY slot"
+            ).fetchall()
+            responses = [pickle.loads(response) for _, _, response, _ in rows]
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError) as e:
+            print(f"Could not load semantic cache from {self.path}: {e}")
+            return
+
+        if rows:
+            self._matrix = np.vstack([np.frombuffer(vector, dtype=np.float32) for _, vector, _, _ in rows])
+            self._queries = [query for query, _, _, _ in rows]
+            self._responses = responses
+            self._last_used = [last_used for _, _, _, last_used in rows]
+            self._clock = max(self._last_used)